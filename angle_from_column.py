@@ -1,7 +1,49 @@
 #!/usr/bin/env python3
 import argparse
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import hashlib
+import io
+from itertools import combinations
 import json
+from math import comb
+import mmap
+import os
 from pathlib import Path
+import socketserver
+import stat
+import sys
+import time
+from typing import Iterable, Iterator, NamedTuple, TextIO
+
+from pattern_generation import (
+    build_vernier_rings,
+    code_typecode,
+    descriptor_rings,
+    ecc_check,
+    ecc_masks,
+    is_order_codes,
+    pack_ring,
+    parse_pattern,
+    split_ecc_codes,
+    unpack_codes,
+    unpack_rings,
+    vernier_phase_bits,
+)
+
+# numpy is only needed for the bulk decoders; it is imported on first use so
+# one-shot CLI decodes do not pay for it.
+np = None
+
+STREAM_BUFFER = 1 << 20
+# Target size of one --workers shard; keeps per-shard results bounded.
+SHARD_BYTES = 32 << 20
+# Largest ring count for which a dense 2**rings lookup table is built.
+MAX_TABLE_RINGS = 24
+INDEX_CACHE_MAGIC = b"GCIDX1\n"
+INDEX_CACHE_HEADER = 512
 
 
 def lcm(a: int, b: int) -> int:
@@ -26,14 +68,1337 @@ def parse_column(text: str) -> list[int]:
     return [int(v.strip()) for v in text.strip().split(",") if v.strip() != ""]
 
 
-def load_rings(path: Path) -> list[list[int]]:
-    data = json.loads(path.read_text())
+def load_pattern(path: Path) -> dict:
+    # pattern.json, its packed variant, or a packed .bin file.
+    return parse_pattern(path.read_bytes())
+
+
+def pattern_rings(data: dict) -> list[list[int]]:
     rings = data.get("rings")
+    if not rings and data.get("procedural"):
+        check_descriptor(data)
+        rings = data["rings"] = descriptor_rings(data)
+    if not rings and "rings_packed" in data:
+        rings = data["rings"] = unpack_rings(data["rings_packed"], data["ring_lengths"])
     if not rings:
         raise SystemExit("pattern.json missing 'rings'")
     return rings
 
 
+def load_rings(path: Path) -> list[list[int]]:
+    return pattern_rings(load_pattern(path))
+
+
+def check_descriptor(data: dict) -> None:
+    if data.get("scheme") == "vernier":
+        if not data.get("periods") or not data.get("phase_bits"):
+            raise SystemExit("procedural vernier pattern needs 'periods' and 'phase_bits'")
+        return
+    if not isinstance(data.get("sections"), int) or data["sections"] <= 0:
+        raise SystemExit("procedural pattern needs 'sections' > 0")
+    if data.get("order", "gray") not in ("gray", "binary"):
+        raise SystemExit(f"procedural pattern has unknown order {data['order']!r}")
+
+
+def pattern_codes(data: dict) -> tuple[array, int] | None:
+    # Per-column packed codes and the ring count they span, or None when the
+    # rings differ in length. Packed rings are unpacked straight to codes.
+    if not data.get("rings") and "rings_packed" in data:
+        lengths = data["ring_lengths"]
+        if len(set(lengths)) != 1:
+            return None
+        return unpack_codes(data["rings_packed"], lengths), len(lengths)
+    rings = pattern_rings(data)
+    if len({len(ring) for ring in rings}) != 1:
+        return None
+    return column_codes(rings), len(rings)
+
+
+def has_rings(data: dict, rings: list[list[int]]) -> bool:
+    # Packed patterns are compared byte for byte, without unpacking.
+    if not data.get("rings") and "rings_packed" in data:
+        return data["ring_lengths"] == [len(ring) for ring in rings] and data[
+            "rings_packed"
+        ] == b"".join(pack_ring(ring) for ring in rings)
+    return pattern_rings(data) == rings
+
+
+def require_numpy():
+    # Loads numpy into the module global on first use and returns it.
+    global np
+    if np is None:
+        try:
+            import numpy
+        except ImportError:
+            raise SystemExit("numpy is required for this (pip install numpy).")
+        np = numpy
+    return np
+
+
+def pack_matrix(matrix: "np.ndarray") -> "np.ndarray":
+    # (N, rings) bits -> N codes, ring 0 as the most significant bit.
+    weights = np.left_shift(1, np.arange(matrix.shape[1] - 1, -1, -1), dtype=np.int64)
+    return matrix @ weights
+
+
+def decode_matrix(index: "ColumnIndex", matrix) -> "np.ndarray":
+    require_numpy()
+    matrix = np.asarray(matrix, dtype=np.uint8)
+    if matrix.ndim != 2 or matrix.shape[1] != index.ring_count:
+        raise ValueError(
+            f"Expected an (N, {index.ring_count}) column matrix, got shape {matrix.shape}."
+        )
+    if matrix.size and matrix.max() > 1:
+        raise ValueError("Column bits must be 0 or 1.")
+    cols = index.lookup_array(pack_matrix(matrix))
+    angles = cols * 360.0 / index.total_cols
+    angles[cols < 0] = np.nan
+    return angles
+
+
+def decode_intensities(index: "ColumnIndex", matrix) -> "np.ndarray":
+    # Sub-column angles from per-ring intensities in 0..1. The hard decode of
+    # the thresholded bits gives column c; the rings that flip between c and
+    # its neighbours read partway between their two values in proportion to
+    # how far the sample window reaches across that boundary.
+    require_numpy()
+    values = np.asarray(matrix, dtype=np.float64)
+    if values.ndim == 1:
+        values = values[None, :]
+    if values.ndim != 2 or values.shape[1] != index.ring_count:
+        raise ValueError(
+            f"Expected an (N, {index.ring_count}) intensity matrix, got shape {values.shape}."
+        )
+    total = index.total_cols
+    cols = index.lookup_array(pack_matrix((values >= 0.5).astype(np.int64)))
+    found = cols >= 0
+    col = np.where(found, cols, 0)
+
+    codes = index.code_array()
+    shifts = np.arange(index.ring_count - 1, -1, -1)
+    here = codes[col]
+    bits = (here[:, None] >> shifts) & 1
+    spill = np.abs(values - bits)
+
+    def reach(neighbour: "np.ndarray") -> "np.ndarray":
+        flips = ((here ^ codes[neighbour])[:, None] >> shifts) & 1
+        count = flips.sum(axis=1)
+        return (spill * flips).sum(axis=1) / np.maximum(count, 1)
+
+    frac = 0.5 + reach((col + 1) % total) - reach((col - 1) % total)
+    angles = (col + np.clip(frac, 0.0, 1.0)) * 360.0 / total
+    angles[~found] = np.nan
+    return angles
+
+
+def pack_bits(bits: list[int]) -> int:
+    # Ring 0 is the most significant bit, matching pattern_generation.
+    code = 0
+    for bit in bits:
+        code = (code << 1) | bit
+    return code
+
+
+def column_bits(column: str | list[int]) -> list[int]:
+    # Accepts "1,0,1" text, a bare "101" bit string or a list of bits.
+    if isinstance(column, str):
+        if "," in column:
+            return parse_column(column)
+        return [int(bit) for bit in column.strip()]
+    return list(column)
+
+
+def column_runs(cols: Iterable[int]) -> list[tuple[int, int]]:
+    # Sorted column indices -> merged [start, end) runs.
+    runs: list[tuple[int, int]] = []
+    for col in cols:
+        if runs and runs[-1][1] == col:
+            runs[-1] = (runs[-1][0], col + 1)
+        else:
+            runs.append((col, col + 1))
+    return runs
+
+
+def runs_to_degrees(runs: list[tuple[int, int]], total_cols: int) -> list[tuple[float, float]]:
+    # A run touching 360° and one starting at 0° are one interval across 0°;
+    # it is returned with start > end.
+    if len(runs) > 1 and runs[0][0] == 0 and runs[-1][1] == total_cols:
+        runs = runs[1:-1] + [(runs[-1][0], runs[0][1])]
+    scale = 360.0 / total_cols
+    return [(lo * scale, hi * scale) for lo, hi in runs]
+
+
+def column_codes(rings: list[list[int]]) -> array:
+    total_cols = lcm_list([len(r) for r in rings])
+    codes = [0] * total_cols
+    for ring in rings:
+        seg_len = total_cols // len(ring)
+        expanded = [bit for bit in ring for _ in range(seg_len)]
+        codes = [(code << 1) | bit for code, bit in zip(codes, expanded)]
+    return array(code_typecode(len(rings)), codes)
+
+
+def segment_cells(rings: list[list[int]], total_cols: int) -> tuple[list[int], list[int]]:
+    # (start column, code) of every stretch between ring segment boundaries,
+    # found by sweeping each boundary once; one cell per column when the
+    # rings share a length.
+    scales = [total_cols // len(ring) for ring in rings]
+    starts = sorted(
+        {seg * scale for scale, ring in zip(scales, rings) for seg in range(len(ring))}
+    )
+    codes = []
+    for start in starts:
+        code = 0
+        for ring, scale in zip(rings, scales):
+            code = (code << 1) | ring[start // scale]
+        codes.append(code)
+    return starts, codes
+
+
+def sort_columns(codes) -> tuple[array, array]:
+    # (codes ascending as uint64, their columns as uint32); columns sharing a
+    # code stay in column order.
+    try:
+        import numpy as np
+    except ImportError:
+        order = sorted(range(len(codes)), key=codes.__getitem__)
+        return array("Q", (codes[col] for col in order)), array("I", order)
+    values = np.asarray(codes, dtype=np.uint64)
+    order = np.argsort(values, kind="stable")
+    return array("Q", values[order].tobytes()), array("I", order.astype(np.uint32).tobytes())
+
+
+class ColumnIndex:
+    def __init__(self, rings: list[list[int]]) -> None:
+        self._index_codes(column_codes(rings), len(rings))
+
+    @classmethod
+    def from_codes(cls, codes, ring_count: int) -> "ColumnIndex":
+        index = cls.__new__(cls)
+        index._index_codes(codes, ring_count)
+        return index
+
+    def _index_codes(self, codes, ring_count: int) -> None:
+        self.ring_count = ring_count
+        self.total_cols = len(codes)
+        self.codes = codes
+        # Columns sorted by code; exact lookups bisect these arrays, and the
+        # code -> columns dict is only built if something needs it.
+        self.sorted_codes, self.sorted_cols = sort_columns(codes)
+        self._columns: dict[int, list[int]] | None = None
+        self._table = None
+        self._mih: dict[int, list[tuple[int, dict[int, list[int]]]]] = {}
+
+    @property
+    def columns(self) -> dict[int, list[int]]:
+        if self._columns is None:
+            columns: dict[int, list[int]] = {}
+            for code, col in zip(self.sorted_codes, self.sorted_cols):
+                columns.setdefault(code, []).append(col)
+            self._columns = columns
+        return self._columns
+
+    def lookup(self, code: int) -> list[int]:
+        lo = bisect_left(self.sorted_codes, code)
+        hi = bisect_right(self.sorted_codes, code, lo)
+        return self.sorted_cols[lo:hi].tolist()
+
+    def intervals(self, code: int) -> list[tuple[int, int]]:
+        return column_runs(self.lookup(code))
+
+    def distinct_codes(self):
+        return self.columns
+
+    def code_at(self, col: int) -> int:
+        return self.codes[col]
+
+    def nearest(self, code: int, max_distance: int) -> list[tuple[int, int]]:
+        # Closest columns within max_distance flipped bits, as (column, distance).
+        exact = self.lookup(code)
+        if exact or max_distance <= 0:
+            return [(col, 0) for col in exact]
+        flips = sum(comb(self.ring_count, d) for d in range(1, max_distance + 1))
+        parts = max_distance + 1
+        mih_candidates = parts * len(self.distinct_codes()) >> (self.ring_count // parts)
+        if flips <= mih_candidates:
+            codes, distance = self._nearest_by_flips(code, max_distance)
+        else:
+            codes, distance = self._nearest_by_mih(code, max_distance)
+        return [(col, distance) for c in sorted(codes) for col in self.lookup(c)]
+
+    def _nearest_by_flips(self, code: int, max_distance: int) -> tuple[list[int], int]:
+        # Dense code spaces: probe every code within the radius, nearest first.
+        bits = [1 << b for b in range(self.ring_count)]
+        known = self.distinct_codes()
+        for distance in range(1, max_distance + 1):
+            found = [
+                code ^ sum(flips)
+                for flips in combinations(bits, distance)
+                if code ^ sum(flips) in known
+            ]
+            if found:
+                return found, distance
+        return [], 0
+
+    def _nearest_by_mih(self, code: int, max_distance: int) -> tuple[list[int], int]:
+        # Sparse code spaces: split the bits into max_distance + 1 chunks; any
+        # code within the radius agrees exactly with the query on one chunk.
+        candidates: set[int] = set()
+        for mask, buckets in self._mih_tables(max_distance):
+            candidates.update(buckets.get(code & mask, ()))
+        best = max_distance + 1
+        found: list[int] = []
+        for candidate in candidates:
+            distance = (candidate ^ code).bit_count()
+            if distance > max_distance:
+                continue
+            if distance < best:
+                best, found = distance, [candidate]
+            elif distance == best:
+                found.append(candidate)
+        return found, best
+
+    def _mih_tables(self, max_distance: int) -> list[tuple[int, dict[int, list[int]]]]:
+        tables = self._mih.get(max_distance)
+        if tables is None:
+            parts = max_distance + 1
+            tables = []
+            for part in range(parts):
+                lo = part * self.ring_count // parts
+                hi = (part + 1) * self.ring_count // parts
+                mask = ((1 << (hi - lo)) - 1) << lo
+                buckets: dict[int, list[int]] = {}
+                for code in self.distinct_codes():
+                    buckets.setdefault(code & mask, []).append(code)
+                tables.append((mask, buckets))
+            self._mih[max_distance] = tables
+        return tables
+
+    def table(self) -> "np.ndarray":
+        # Dense code -> first matching column, -1 where no column matches;
+        # subclasses fill it in _build_table().
+        if self._table is None:
+            require_numpy()
+            if self.ring_count > MAX_TABLE_RINGS:
+                raise ValueError(
+                    f"{self.ring_count} rings is too many for a dense lookup table."
+                )
+            self._table = self._build_table()
+        return self._table
+
+    def _build_table(self) -> "np.ndarray":
+        table = np.full(1 << self.ring_count, -1, dtype=np.int32)
+        # Written back to front so a repeated code keeps its first column.
+        codes = np.frombuffer(self.sorted_codes, dtype=np.uint64)[::-1]
+        table[codes.astype(np.int64)] = np.frombuffer(self.sorted_cols, dtype=np.uint32)[::-1]
+        return table
+
+    def lookup_array(self, codes: "np.ndarray") -> "np.ndarray":
+        return self.table()[codes]
+
+    def code_array(self) -> "np.ndarray":
+        # Per-column codes as one array, for vectorized neighbour lookups.
+        require_numpy()
+        if getattr(self, "_code_array", None) is None:
+            self._code_array = np.fromiter(
+                (self.code_at(col) for col in range(self.total_cols)),
+                dtype=np.int64,
+                count=self.total_cols,
+            )
+        return self._code_array
+
+    def angles(self, code: int) -> list[float]:
+        return [(i * 360.0) / self.total_cols for i in self.lookup(code)]
+
+
+def gray_decode(code: int, bits: int) -> int:
+    # Prefix XOR of the code from the MSB down, in log2(bits) steps.
+    shift = 1
+    while shift < bits:
+        code ^= code >> shift
+        shift <<= 1
+    return code
+
+
+def expected_ring(sections: int, ring_idx: int, order: str) -> list[int]:
+    columns = 1 << sections
+    half = 1 << (sections - 1 - ring_idx)
+    if order == "gray":
+        # Gray bit b is bit b XOR bit b+1: 0s, 1s, 1s, 0s with period 4 * 2**b.
+        period = [0] * half + [1] * (2 * half) + [0] * half
+    else:
+        period = [0] * half + [1] * half
+    return (period * (columns // len(period) + 1))[:columns]
+
+
+def closed_form_order(rings: list[list[int]], declared: str | None = None) -> str | None:
+    sections = len(rings)
+    if any(len(ring) != 1 << sections for ring in rings):
+        return None
+    candidates = ["gray", "binary"]
+    if declared in candidates:
+        candidates.remove(declared)
+        candidates.insert(0, declared)
+    for order in candidates:
+        if all(
+            ring == expected_ring(sections, ring_idx, order)
+            for ring_idx, ring in enumerate(rings)
+        ):
+            return order
+    return None
+
+
+class ClosedFormIndex(ColumnIndex):
+    def __init__(self, ring_count: int, order: str) -> None:
+        self.ring_count = ring_count
+        self.total_cols = 1 << ring_count
+        self.order = order
+        self._codes: dict[int, list[int]] | None = None
+        self._table = None
+        self._mih = {}
+
+    def lookup(self, code: int) -> list[int]:
+        if code >> self.ring_count:
+            return []
+        if self.order == "gray":
+            code = gray_decode(code, self.ring_count)
+        return [code]
+
+    def nearest(self, code: int, max_distance: int) -> list[tuple[int, int]]:
+        # Every in-range code is some column, so a read either matches exactly
+        # or has bits beyond the rings that no flip within them can explain.
+        return [(col, 0) for col in self.lookup(code)]
+
+    def distinct_codes(self) -> dict[int, list[int]]:
+        if self._codes is None:
+            self._codes = {self.code_at(col): [col] for col in range(self.total_cols)}
+        return self._codes
+
+    def _build_table(self) -> "np.ndarray":
+        return self.lookup_array(np.arange(self.total_cols, dtype=np.int64))
+
+    def code_at(self, col: int) -> int:
+        return col ^ (col >> 1) if self.order == "gray" else col
+
+    def code_array(self) -> "np.ndarray":
+        require_numpy()
+        cols = np.arange(self.total_cols, dtype=np.int64)
+        return cols ^ (cols >> 1) if self.order == "gray" else cols
+
+    def lookup_array(self, codes: "np.ndarray") -> "np.ndarray":
+        # No table needed: every code in range maps to exactly one column.
+        cols = codes.astype(np.int64)
+        if self.order == "gray":
+            shift = 1
+            while shift < self.ring_count:
+                cols ^= cols >> shift
+                shift <<= 1
+        return cols
+
+
+class IntervalIndex(ColumnIndex):
+    # For rings of unequal length whose LCM dwarfs the ring data (e.g. coprime
+    # 7/11/13/17 tracks): intersect each ring's runs of matching segments
+    # instead of materializing every LCM column.
+    def __init__(self, rings: list[list[int]]) -> None:
+        self.ring_count = len(rings)
+        self.ring_lengths = [len(r) for r in rings]
+        self.total_cols = lcm_list(self.ring_lengths)
+        self.rings = rings
+        # runs[ring][bit] = (starts, ends) of merged same-bit segments, in columns.
+        self.runs: list[tuple[tuple[list[int], list[int]], ...]] = []
+        for ring in rings:
+            scale = self.total_cols // len(ring)
+            per_bit: tuple[tuple[list[int], list[int]], ...] = (([], []), ([], []))
+            for seg, bit in enumerate(ring):
+                starts, ends = per_bit[bit]
+                if ends and ends[-1] == seg * scale:
+                    ends[-1] = (seg + 1) * scale
+                else:
+                    starts.append(seg * scale)
+                    ends.append((seg + 1) * scale)
+            self.runs.append(per_bit)
+        self._codes: dict[int, int] | None = None
+        self._table = None
+        self._mih = {}
+
+    def intervals(self, code: int) -> list[tuple[int, int]]:
+        # Matching [start, end) column ranges, narrowing from the sparsest ring.
+        if code >> self.ring_count:
+            return []
+        shift = self.ring_count - 1
+        runs = [self.runs[r][(code >> (shift - r)) & 1] for r in range(self.ring_count)]
+        runs.sort(key=lambda pair: len(pair[0]))
+        current = list(zip(*runs[0]))
+        for starts, ends in runs[1:]:
+            narrowed = []
+            for lo, hi in current:
+                i = bisect_right(ends, lo)
+                while i < len(starts) and starts[i] < hi:
+                    narrowed.append((max(lo, starts[i]), min(hi, ends[i])))
+                    i += 1
+            if not narrowed:
+                return []
+            current = narrowed
+        return current
+
+    def lookup(self, code: int) -> list[int]:
+        return [col for lo, hi in self.intervals(code) for col in range(lo, hi)]
+
+    def code_at(self, col: int) -> int:
+        code = 0
+        for ring in self.rings:
+            code = (code << 1) | ring[col * len(ring) // self.total_cols]
+        return code
+
+    def distinct_codes(self) -> dict[int, int]:
+        # Code -> first column, found by sweeping every ring boundary once.
+        if self._codes is None:
+            codes: dict[int, int] = {}
+            for start, code in zip(*segment_cells(self.rings, self.total_cols)):
+                codes.setdefault(code, start)
+            self._codes = codes
+        return self._codes
+
+    def _build_table(self) -> "np.ndarray":
+        codes = self.distinct_codes()
+        table = np.full(1 << self.ring_count, -1, dtype=np.int64)
+        table[list(codes)] = list(codes.values())
+        return table
+
+
+class VernierIndex(IntervalIndex):
+    # Vernier tracks (see pattern_generation --scheme vernier): each track's
+    # Gray rings give its phase within one period, the phase difference of two
+    # tracks gives a coarse angle, and each track then picks the one segment
+    # with its phase nearest that estimate. No LCM columns are enumerated.
+    def __init__(self, periods: list[int], phase_bits: int) -> None:
+        super().__init__(build_vernier_rings(periods, phase_bits))
+        self.periods = periods
+        self.phase_bits = phase_bits
+        # Below this resolution the coarse estimate can land a period off.
+        self.arithmetic = phase_bits >= vernier_phase_bits(periods)
+
+    def phases(self, code: int) -> list[int]:
+        bits = self.phase_bits
+        mask = (1 << bits) - 1
+        last = len(self.periods) - 1
+        return [
+            gray_decode((code >> ((last - t) * bits)) & mask, bits)
+            for t in range(len(self.periods))
+        ]
+
+    def intervals(self, code: int) -> list[tuple[int, int]]:
+        if code >> self.ring_count:
+            return []
+        if not self.arithmetic:
+            return super().intervals(code)
+        steps = 1 << self.phase_bits
+        phases = self.phases(code)
+        beat = self.periods[1] - self.periods[0]
+        # frac(beat * turn) ~= difference of the two phases; every one of the
+        # |beat| solutions for the turn fraction is a candidate.
+        base = (phases[1] - phases[0]) / steps
+        runs: list[tuple[int, int]] = []
+        for k in range(abs(beat)):
+            turn = ((base + k) / beat) % 1.0
+            run = self._refine(turn * self.total_cols, phases, steps)
+            if run is None:
+                continue
+            lo, hi = run
+            lo, hi = lo % self.total_cols, lo % self.total_cols + (hi - lo)
+            if hi > self.total_cols:
+                runs += [(lo, self.total_cols), (0, hi - self.total_cols)]
+            else:
+                runs.append((lo, hi))
+        return sorted(set(runs))
+
+    def _refine(
+        self, estimate: float, phases: list[int], steps: int
+    ) -> tuple[int, int] | None:
+        # Intersect, track by track, the segment with the decoded phase closest
+        # to the running estimate; columns are left unwrapped until the end.
+        lo = hi = None
+        for t, phase in enumerate(phases):
+            scale = self.total_cols // self.ring_lengths[t * self.phase_bits]
+            period = round((estimate / scale - 0.5 - phase) / steps)
+            start = (period * steps + phase) * scale
+            lo = start if lo is None else max(lo, start)
+            hi = start + scale if hi is None else min(hi, start + scale)
+            if lo >= hi:
+                return None
+            estimate = (lo + hi) / 2
+        return lo, hi
+
+
+class EccIndex(ColumnIndex):
+    # Data rings followed by parity/Hamming check rings (pattern_generation
+    # --ecc). A read is corrected through a syndrome table, then looked up in
+    # the index over the data rings alone.
+    def __init__(self, inner: ColumnIndex, ecc: str, data_rings: int) -> None:
+        self.inner = inner
+        self.ecc = ecc
+        self.data_rings = data_rings
+        self.masks = ecc_masks(data_rings, ecc)
+        self.checks = len(self.masks)
+        self.ring_count = data_rings + self.checks
+        self.total_cols = inner.total_cols
+        # syndrome -> bit to flip in the full code; 0 where no single flip
+        # explains the syndrome (or, for parity, several could).
+        self.syndromes = [0] * (1 << self.checks)
+        flips = [1 << j for j in range(self.checks)]
+        flips += [1 << (bit + self.checks) for bit in range(data_rings)]
+        seen = set()
+        for flip in flips:
+            syndrome = ecc_check(flip >> self.checks, self.masks) ^ (
+                flip & ((1 << self.checks) - 1)
+            )
+            self.syndromes[syndrome] = 0 if syndrome in seen else flip
+            seen.add(syndrome)
+        self._codes = None
+        self._table = None
+        self._mih = {}
+
+    def with_checks(self, data: int) -> int:
+        return (data << self.checks) | ecc_check(data, self.masks)
+
+    def correct(self, code: int) -> tuple[int | None, str]:
+        # (data code, "clean" | "corrected" | "uncorrectable").
+        if code >> self.ring_count:
+            return None, "uncorrectable"
+        data = code >> self.checks
+        syndrome = ecc_check(data, self.masks) ^ (code & ((1 << self.checks) - 1))
+        if not syndrome:
+            return data, "clean"
+        flip = self.syndromes[syndrome]
+        if not flip:
+            return None, "uncorrectable"
+        return (code ^ flip) >> self.checks, "corrected"
+
+    def lookup(self, code: int) -> list[int]:
+        data, _ = self.correct(code)
+        return [] if data is None else self.inner.lookup(data)
+
+    def intervals(self, code: int) -> list[tuple[int, int]]:
+        data, _ = self.correct(code)
+        return [] if data is None else self.inner.intervals(data)
+
+    def code_at(self, col: int) -> int:
+        return self.with_checks(self.inner.code_at(col))
+
+    def distinct_codes(self):
+        if self._codes is None:
+            data_codes = self.inner.distinct_codes()
+            self._codes = {self.with_checks(code): cols for code, cols in data_codes.items()}
+        return self._codes
+
+    def _build_table(self) -> "np.ndarray":
+        # Dense over the full code, with single-bit corrections folded in.
+        data = np.arange(1 << self.data_rings, dtype=np.int64)
+        data_checks = np.zeros_like(data)
+        for bit in range(self.data_rings):
+            data_checks ^= ((data >> bit) & 1) * ecc_check(1 << bit, self.masks)
+        codes = np.arange(1 << self.ring_count, dtype=np.int64)
+        syndrome = data_checks[codes >> self.checks] ^ (codes & ((1 << self.checks) - 1))
+        flips = np.asarray(self.syndromes, dtype=np.int64)[syndrome]
+        cols = self.inner.lookup_array((codes ^ flips) >> self.checks)
+        cols[(syndrome != 0) & (flips == 0)] = -1
+        return cols
+
+
+def closed_form_codes_order(
+    codes, ring_count: int, declared: str | None = None
+) -> str | None:
+    if len(codes) != 1 << ring_count:
+        return None
+    candidates = ["gray", "binary"]
+    if declared in candidates:
+        candidates.remove(declared)
+        candidates.insert(0, declared)
+    for order in candidates:
+        if is_order_codes(codes, ring_count, order):
+            return order
+    return None
+
+
+def build_index_from_codes(
+    codes, ring_count: int, order: str | None = None
+) -> ColumnIndex:
+    closed_order = closed_form_codes_order(codes, ring_count, order)
+    if closed_order:
+        return ClosedFormIndex(ring_count, closed_order)
+    return ColumnIndex.from_codes(codes, ring_count)
+
+
+def descriptor_index(data: dict) -> ColumnIndex:
+    # Procedural patterns never materialize their columns: Gray/binary codes
+    # are decoded in closed form and vernier tracks arithmetically.
+    check_descriptor(data)
+    if data.get("scheme") == "vernier":
+        return VernierIndex(data["periods"], data["phase_bits"])
+    index = ClosedFormIndex(data["sections"], data.get("order", "gray"))
+    if data.get("ecc"):
+        index = EccIndex(index, data["ecc"], data["sections"])
+    return index
+
+
+def pattern_index(data: dict) -> ColumnIndex:
+    if data.get("procedural"):
+        return descriptor_index(data)
+    order = data.get("order")
+    if data.get("scheme") == "vernier":
+        periods, phase_bits = data.get("periods"), data.get("phase_bits")
+        # Trust the declared layout only if the rings really follow it.
+        if periods and phase_bits and has_rings(data, build_vernier_rings(periods, phase_bits)):
+            return VernierIndex(periods, phase_bits)
+    found = pattern_codes(data)
+    if found is None:
+        return build_index(pattern_rings(data), order)
+    codes, ring_count = found
+    if data.get("ecc"):
+        data_rings = data.get("data_rings", 0)
+        masks = ecc_masks(data_rings, data["ecc"]) if 0 < data_rings < ring_count else []
+        if data_rings + len(masks) == ring_count:
+            data_codes = split_ecc_codes(codes, data_rings, masks)
+            if data_codes is not None:
+                inner = build_index_from_codes(data_codes, data_rings, order)
+                return EccIndex(inner, data["ecc"], data_rings)
+    return build_index_from_codes(codes, ring_count, order)
+
+
+def build_index(rings: list[list[int]], order: str | None = None) -> ColumnIndex:
+    closed_order = closed_form_order(rings, order)
+    if closed_order:
+        return ClosedFormIndex(len(rings), closed_order)
+    ring_lengths = [len(r) for r in rings]
+    if lcm_list(ring_lengths) > sum(ring_lengths):
+        return IntervalIndex(rings)
+    return ColumnIndex(rings)
+
+
+class MappedColumnIndex(ColumnIndex):
+    # Column index read back from the cache: the code-sorted arrays are mmap'd
+    # as they are, and per-column codes are only rebuilt if needed.
+    def __init__(self, ring_count: int, total_cols: int, codes, cols) -> None:
+        self.ring_count = ring_count
+        self.total_cols = total_cols
+        self.sorted_codes = codes
+        self.sorted_cols = cols
+        self._columns: dict[int, list[int]] | None = None
+        self._codes_by_col: array | None = None
+        self._table = None
+        self._mih = {}
+
+    def code_at(self, col: int) -> int:
+        if self._codes_by_col is None:
+            codes = array("Q", bytes(8 * self.total_cols))
+            for code, column in zip(self.sorted_codes, self.sorted_cols):
+                codes[column] = code
+            self._codes_by_col = codes
+        return self._codes_by_col[col]
+
+
+def index_cache_path(path: Path) -> Path:
+    return path.with_name(path.name + ".idx")
+
+
+def write_index_cache(cache_path: Path, index: ColumnIndex, digest: str) -> None:
+    ecc = None
+    if isinstance(index, EccIndex):
+        # Cache the data-ring index; the check rings follow from the scheme.
+        ecc = [index.ecc, index.data_rings]
+        index = index.inner
+    header = {
+        "sha256": digest,
+        "ring_count": index.ring_count,
+        "total_cols": index.total_cols,
+        "order": getattr(index, "order", None),
+        "ring_lengths": getattr(index, "ring_lengths", None),
+        "vernier": None,
+        "ecc": ecc,
+    }
+    if isinstance(index, VernierIndex):
+        header["vernier"] = [index.periods, index.phase_bits]
+    body = b""
+    if isinstance(index, VernierIndex):
+        # Rebuilt from periods and phase bits alone.
+        pass
+    elif isinstance(index, IntervalIndex):
+        # The ring bits are smaller than any column table here; keep just them.
+        body = bytes(bit for ring in index.rings for bit in ring)
+    elif not isinstance(index, ClosedFormIndex):
+        body = bytes(index.sorted_codes) + bytes(index.sorted_cols)
+    head = INDEX_CACHE_MAGIC + json.dumps(header).encode() + b"\n"
+    if len(head) > INDEX_CACHE_HEADER:
+        return
+    tmp_path = cache_path.with_name(cache_path.name + ".tmp")
+    try:
+        with open(tmp_path, "wb") as handle:
+            handle.write(head.ljust(INDEX_CACHE_HEADER, b" "))
+            handle.write(body)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        # A read-only pattern directory just means no cache.
+        pass
+
+
+def read_index_cache(cache_path: Path, digest: str) -> ColumnIndex | None:
+    try:
+        with open(cache_path, "rb") as handle:
+            head = handle.read(INDEX_CACHE_HEADER)
+            if not head.startswith(INDEX_CACHE_MAGIC):
+                return None
+            header = json.loads(head[len(INDEX_CACHE_MAGIC):])
+            # Keyed by content only: an edit can keep both size and mtime.
+            if header["sha256"] != digest:
+                return None
+            if header["order"]:
+                index = ClosedFormIndex(header["ring_count"], header["order"])
+            elif header.get("vernier"):
+                index = VernierIndex(*header["vernier"])
+            elif header["ring_lengths"]:
+                bits = handle.read()
+                # A short or padded body would shift every ring after it.
+                if len(bits) != sum(header["ring_lengths"]):
+                    return None
+                rings = []
+                for length in header["ring_lengths"]:
+                    rings.append(list(bits[:length]))
+                    bits = bits[length:]
+                index = IntervalIndex(rings)
+            else:
+                mapped = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+                view = memoryview(mapped)[INDEX_CACHE_HEADER:]
+                # One (uint64 code, uint32 column) pair per column, or stale.
+                count = header["total_cols"]
+                if len(view) != 12 * count:
+                    return None
+                codes = view[: count * 8].cast("Q")
+                cols = view[count * 8 :].cast("I")
+                index = MappedColumnIndex(
+                    header["ring_count"], header["total_cols"], codes, cols
+                )
+    except (OSError, ValueError, KeyError):
+        return None
+    if header.get("ecc"):
+        index = EccIndex(index, *header["ecc"])
+    return index
+
+
+def load_index(path: Path, cache: bool = True) -> ColumnIndex:
+    cache_path = index_cache_path(path)
+    raw = path.read_bytes()
+    digest = hashlib.sha256(raw).hexdigest()
+    index = read_index_cache(cache_path, digest) if cache else None
+    if index is None:
+        index = pattern_index(parse_pattern(raw))
+        if cache:
+            write_index_cache(cache_path, index, digest)
+    return index
+
+
+class Decoder:
+    # Long-lived decoder: parse the pattern and build the index once, then
+    # decode as many columns as needed against it.
+    def __init__(
+        self,
+        pattern: str | Path | list[list[int]] = "pattern.json",
+        order: str | None = None,
+        cache: bool = True,
+    ) -> None:
+        if isinstance(pattern, (str, Path)):
+            self.index = load_index(Path(pattern), cache=cache)
+        else:
+            self.index = build_index(pattern, order)
+        self.ring_count = self.index.ring_count
+        self.total_cols = self.index.total_cols
+
+    @classmethod
+    def from_codes(cls, codes, ring_count: int, order: str | None = None) -> "Decoder":
+        decoder = cls.__new__(cls)
+        decoder.index = build_index_from_codes(codes, ring_count, order)
+        decoder.ring_count = ring_count
+        decoder.total_cols = decoder.index.total_cols
+        return decoder
+
+    def pack(self, bits: int | str | list[int]) -> int:
+        if isinstance(bits, int):
+            if bits < 0 or bits >> self.ring_count:
+                raise ValueError(f"Code {bits} does not fit in {self.ring_count} rings.")
+            return bits
+        bits = column_bits(bits)
+        if len(bits) != self.ring_count:
+            raise ValueError(
+                f"Column length {len(bits)} does not match ring count {self.ring_count}."
+            )
+        if any(bit not in (0, 1) for bit in bits):
+            raise ValueError("Column bits must be 0 or 1.")
+        return pack_bits(bits)
+
+    def decode(self, bits: int | str | list[int]) -> list[float]:
+        return self.index.angles(self.pack(bits))
+
+    def decode_int(self, code: int) -> list[float]:
+        return self.index.angles(code)
+
+    def decode_checked(self, bits: int | str | list[int]) -> tuple[list[float], str]:
+        # Angles plus "clean", "corrected" or "uncorrectable" for patterns
+        # with check rings; always "clean" otherwise.
+        code = self.pack(bits)
+        status = self.index.correct(code)[1] if isinstance(self.index, EccIndex) else "clean"
+        return self.index.angles(code), status
+
+    def decode_nearest(
+        self, bits: int | str | list[int], max_distance: int
+    ) -> list[tuple[float, int]]:
+        return [
+            ((col * 360.0) / self.total_cols, distance)
+            for col, distance in self.index.nearest(self.pack(bits), max_distance)
+        ]
+
+    def decode_intervals(self, bits: int | str | list[int]) -> list[tuple[float, float]]:
+        return runs_to_degrees(self.index.intervals(self.pack(bits)), self.total_cols)
+
+    def decode_many(self, columns: Iterable[str | list[int] | int]) -> list[list[float]]:
+        return [self.index.angles(self.pack(column)) for column in columns]
+
+    def decode_array(self, matrix) -> "np.ndarray":
+        return decode_matrix(self.index, matrix)
+
+    def decode_fractional(self, intensities) -> "np.ndarray":
+        return decode_intensities(self.index, intensities)
+
+    def decode_orientations(
+        self, bits: int | str | list[int]
+    ) -> list[tuple["Orientation", float]]:
+        return OrientationIndex(self.index).angles(self.pack(bits))
+
+
+class TrackReading(NamedTuple):
+    column: int | None
+    angle: float | None
+    unwrapped: float | None  # cumulative degrees since the first reading
+    velocity: float | None  # degrees per second, smoothed
+    source: str  # "window", "global", "miss" or "rejected"
+
+
+class Tracker:
+    # Continuous reading of a spinning disk: consecutive columns are usually
+    # neighbours, so probe a small window around the last column before
+    # falling back to the global index.
+    def __init__(
+        self,
+        decoder: Decoder,
+        window: int = 4,
+        max_jump: int | None = None,
+        smoothing: float = 0.5,
+    ) -> None:
+        self.decoder = decoder
+        self.window = window
+        self.max_jump = max_jump
+        self.smoothing = smoothing
+        self.column: int | None = None
+        self.unwrapped_cols = 0
+        self.velocity: float | None = None
+        self.timestamp: float | None = None
+
+    def reset(self) -> None:
+        self.column = None
+        self.unwrapped_cols = 0
+        self.velocity = None
+        self.timestamp = None
+
+    def _delta(self, col: int) -> int:
+        # Signed shortest step from the last column, in columns.
+        total = self.decoder.total_cols
+        return (col - self.column + total // 2) % total - total // 2
+
+    def _find(self, code: int) -> tuple[int | None, str]:
+        index = self.decoder.index
+        total = self.decoder.total_cols
+        if self.column is not None:
+            for step in range(self.window + 1):
+                for col in {(self.column + step) % total, (self.column - step) % total}:
+                    if index.code_at(col) == code:
+                        return col, "window"
+        cols = index.lookup(code)
+        if not cols:
+            return None, "miss"
+        if self.column is None:
+            return cols[0], "global"
+        col = min(cols, key=lambda c: abs(self._delta(c)))
+        if self.max_jump is not None and abs(self._delta(col)) > self.max_jump:
+            return col, "rejected"
+        return col, "global"
+
+    def update(self, bits: str | list[int] | int, timestamp: float | None = None) -> TrackReading:
+        code = self.decoder.pack(bits)
+        now = time.monotonic() if timestamp is None else timestamp
+        col, source = self._find(code)
+        if col is None or source == "rejected":
+            return TrackReading(col, None, None, self.velocity, source)
+
+        degrees_per_col = 360.0 / self.decoder.total_cols
+        if self.column is not None:
+            delta = self._delta(col)
+            self.unwrapped_cols += delta
+            elapsed = now - self.timestamp
+            if elapsed > 0:
+                velocity = delta * degrees_per_col / elapsed
+                if self.velocity is None:
+                    self.velocity = velocity
+                else:
+                    self.velocity += self.smoothing * (velocity - self.velocity)
+        else:
+            self.unwrapped_cols = col
+        self.column = col
+        self.timestamp = now
+        return TrackReading(
+            col,
+            col * degrees_per_col,
+            self.unwrapped_cols * degrees_per_col,
+            self.velocity,
+            source,
+        )
+
+
+class Orientation(NamedTuple):
+    # How the printed disk relates to pattern.json, matching the invert and
+    # reverse options of generateRings() in binary_radial_pattern.html.
+    invert: bool  # every bit flipped
+    reverse: bool  # ring order reversed (ring 0 read as the LSB)
+
+
+ORIENTATIONS = [Orientation(invert, reverse) for invert in (False, True) for reverse in (False, True)]
+
+
+def reverse_bits(code: int, bits: int) -> int:
+    return int(f"{code:0{bits}b}"[::-1], 2)
+
+
+class OrientationIndex:
+    # One lookup across every invert/reverse variant. Each variant is a cheap
+    # bijection on codes, so the read code is mapped back to the pattern's own
+    # orientation and looked up in the base index instead of storing 4 tables.
+    def __init__(self, index: ColumnIndex) -> None:
+        self.index = index
+        self.ring_count = index.ring_count
+        self.total_cols = index.total_cols
+        self.mask = (1 << index.ring_count) - 1
+
+    def canonical(self, code: int, orientation: Orientation) -> int:
+        if orientation.invert:
+            code ^= self.mask
+        if orientation.reverse:
+            code = reverse_bits(code, self.ring_count)
+        return code
+
+    def lookup(self, code: int) -> list[tuple[Orientation, int]]:
+        return [
+            (orientation, col)
+            for orientation in ORIENTATIONS
+            for col in self.index.lookup(self.canonical(code, orientation))
+        ]
+
+    def angles(self, code: int) -> list[tuple[Orientation, float]]:
+        return [
+            (orientation, (col * 360.0) / self.total_cols)
+            for orientation, col in self.lookup(code)
+        ]
+
+
+class OrientationReading(NamedTuple):
+    candidates: list[tuple[Orientation, float]]
+    locked: Orientation | None
+
+
+class OrientationSession:
+    # Detect how the disk is mounted from a run of readings: only the true
+    # orientation keeps producing columns next to its previous one. Once a
+    # single orientation has done so lock_after times in a row, lock onto it.
+    def __init__(
+        self,
+        decoder: Decoder,
+        lock_after: int = 3,
+        window: int = 4,
+        angle_offset: float = 0.0,
+    ) -> None:
+        self.decoder = decoder
+        self.index = OrientationIndex(decoder.index)
+        self.lock_after = lock_after
+        self.window = window
+        self.angle_offset = angle_offset
+        self.locked: Orientation | None = None
+        self._last: dict[Orientation, int] = {}
+        self._streak = dict.fromkeys(ORIENTATIONS, 0)
+
+    def unlock(self) -> None:
+        self.locked = None
+        self._last.clear()
+        self._streak = dict.fromkeys(ORIENTATIONS, 0)
+
+    def _near(self, orientation: Orientation, col: int) -> bool:
+        last = self._last.get(orientation)
+        if last is None:
+            return False
+        total = self.index.total_cols
+        return abs((col - last + total // 2) % total - total // 2) <= self.window
+
+    def update(self, bits: int | str | list[int]) -> OrientationReading:
+        code = self.decoder.pack(bits)
+        scale = 360.0 / self.index.total_cols
+        if self.locked is not None:
+            cols = self.index.index.lookup(self.index.canonical(code, self.locked))
+            candidates = [(self.locked, (col * scale + self.angle_offset) % 360.0) for col in cols]
+            return OrientationReading(candidates, self.locked)
+
+        by_orientation: dict[Orientation, list[int]] = {}
+        for orientation, col in self.index.lookup(code):
+            by_orientation.setdefault(orientation, []).append(col)
+        for orientation in ORIENTATIONS:
+            cols = by_orientation.get(orientation)
+            if not cols:
+                self._streak[orientation] = 0
+                self._last.pop(orientation, None)
+                continue
+            near = [col for col in cols if self._near(orientation, col)]
+            self._streak[orientation] = self._streak[orientation] + 1 if near else 0
+            self._last[orientation] = (near or cols)[0]
+
+        ready = [o for o in ORIENTATIONS if self._streak[o] >= self.lock_after]
+        if len(ready) == 1:
+            self.locked = ready[0]
+        candidates = [
+            (orientation, (col * scale + self.angle_offset) % 360.0)
+            for orientation, cols in by_orientation.items()
+            if self.locked in (None, orientation)
+            for col in cols
+        ]
+        return OrientationReading(candidates, self.locked)
+
+
+def iter_codes(
+    lines: Iterable[str], ring_count: int, start_row: int = 0
+) -> Iterator[tuple[int, int]]:
+    for row, line in enumerate(lines, start_row):
+        bits = line.replace(",", "").replace(" ", "").strip()
+        if not bits:
+            continue
+        if len(bits) != ring_count or bits.strip("01"):
+            raise SystemExit(
+                f"Row {row}: expected {ring_count} comma-separated 0/1 bits, got {line.strip()!r}."
+            )
+        yield row, int(bits, 2)
+
+
+def match_runs(
+    index: ColumnIndex, code: int, tolerance: int = 0
+) -> tuple[list[tuple[int, int]], int | None]:
+    # Matching column runs and their Hamming distance (None if nothing matched).
+    runs = index.intervals(code)
+    if runs or not tolerance:
+        return runs, 0 if runs else None
+    nearest = index.nearest(code, tolerance)
+    if not nearest:
+        return [], None
+    return column_runs(sorted(col for col, _ in nearest)), nearest[0][1]
+
+
+def format_matches(
+    index: ColumnIndex, code: int, tolerance: int = 0, fmt: str = "list"
+) -> str:
+    runs, distance = match_runs(index, code, tolerance)
+    total = index.total_cols
+    if fmt == "json":
+        # Object members only; callers add the braces and any row number.
+        text = (
+            f'"matches": {sum(hi - lo for lo, hi in runs)}, '
+            f'"intervals": {json.dumps(runs_to_degrees(runs, total))}'
+        )
+        if tolerance:
+            text += f', "distance": {json.dumps(distance)}'
+        if isinstance(index, EccIndex):
+            text += f', "ecc": "{index.correct(code)[1]}"'
+        return text
+    if fmt == "intervals":
+        text = ";".join(f"{lo:.3f}-{hi:.3f}" for lo, hi in runs_to_degrees(runs, total))
+    else:
+        text = ";".join(
+            f"{(col * 360.0) / total:.3f}" for lo, hi in runs for col in range(lo, hi)
+        )
+    if tolerance:
+        text += f",{'' if distance is None else distance}"
+    return text
+
+
+def cached_matches(
+    cache: dict[int, str], index: ColumnIndex, code: int, tolerance: int, fmt: str
+) -> str:
+    # Captures repeat the same few codes, so format each one only once.
+    text = cache.get(code)
+    if text is None:
+        if len(cache) >= 1 << 16:
+            cache.clear()
+        text = format_matches(index, code, tolerance, fmt)
+        cache[code] = text
+    return text
+
+
+def decode_stream(
+    index: ColumnIndex,
+    lines: Iterable[str],
+    out: TextIO,
+    tolerance: int = 0,
+    start_row: int = 0,
+    fmt: str = "list",
+    ecc_counts: dict[str, int] | None = None,
+) -> int:
+    cache: dict[int, str] = {}
+    rows = 0
+    # Per-row clean/corrected/uncorrectable tallies, to monitor read quality.
+    count_ecc = ecc_counts is not None and isinstance(index, EccIndex)
+    for row, code in iter_codes(lines, index.ring_count, start_row):
+        if count_ecc:
+            status = index.correct(code)[1]
+            ecc_counts[status] = ecc_counts.get(status, 0) + 1
+        text = cached_matches(cache, index, code, tolerance, fmt)
+        if fmt == "json":
+            out.write(f'{{"row": {row}, {text}}}\n')
+        else:
+            out.write(f"{row},{text}\n")
+        rows += 1
+    return rows
+
+
+def shard_ranges(path: str, shards: int) -> list[tuple[int, int]]:
+    # Byte ranges of roughly equal size, each starting at a line boundary.
+    size = os.path.getsize(path)
+    bounds = [0]
+    with open(path, "rb") as handle:
+        for k in range(1, shards):
+            handle.seek(max(size * k // shards, bounds[-1]))
+            handle.readline()
+            bounds.append(handle.tell())
+    bounds.append(size)
+    return [(lo, hi) for lo, hi in zip(bounds, bounds[1:]) if hi > lo]
+
+
+def read_shard(path: str, lo: int, hi: int) -> bytes:
+    with open(path, "rb") as handle:
+        handle.seek(lo)
+        return handle.read(hi - lo)
+
+
+def count_shard_lines(path: str, lo: int, hi: int) -> int:
+    return read_shard(path, lo, hi).count(b"\n")
+
+
+_worker_index: ColumnIndex | None = None
+
+
+def init_worker(pattern: str, cache: bool) -> None:
+    # With the cache on, every worker maps the same .idx file read-only.
+    global _worker_index
+    _worker_index = load_index(Path(pattern), cache=cache)
+
+
+def decode_shard(
+    path: str, lo: int, hi: int, start_row: int, tolerance: int, fmt: str
+) -> tuple[str, dict[str, int]]:
+    lines = read_shard(path, lo, hi).decode("utf-8").split("\n")
+    if lines and lines[-1] == "":
+        lines.pop()
+    out = io.StringIO()
+    ecc_counts: dict[str, int] = {}
+    decode_stream(_worker_index, lines, out, tolerance, start_row, fmt, ecc_counts)
+    return out.getvalue(), ecc_counts
+
+
+def decode_file_parallel(
+    pattern: str,
+    path: str,
+    out: TextIO,
+    workers: int,
+    tolerance: int = 0,
+    cache: bool = True,
+    fmt: str = "list",
+    ecc_counts: dict[str, int] | None = None,
+) -> None:
+    shards = shard_ranges(path, max(workers, -(-os.path.getsize(path) // SHARD_BYTES)))
+    with ProcessPoolExecutor(workers, initializer=init_worker, initargs=(pattern, cache)) as pool:
+        paths = [path] * len(shards)
+        los = [lo for lo, _ in shards]
+        his = [hi for _, hi in shards]
+        # Row numbers continue across shards, so count lines before decoding.
+        counts = list(pool.map(count_shard_lines, paths, los, his))
+        starts = [sum(counts[:k]) for k in range(len(counts))]
+
+        def emit(future) -> None:
+            text, counts = future.result()
+            out.write(text)
+            if ecc_counts is not None:
+                for status, count in counts.items():
+                    ecc_counts[status] = ecc_counts.get(status, 0) + count
+
+        # At most 2 x workers shards in flight, written in order as each
+        # one's turn comes, so a slow reader bounds the memory held here.
+        pending: deque = deque()
+        for shard in range(len(shards)):
+            pending.append(
+                pool.submit(
+                    decode_shard, path, los[shard], his[shard], starts[shard], tolerance, fmt
+                )
+            )
+            if len(pending) >= 2 * workers:
+                emit(pending.popleft())
+        while pending:
+            emit(pending.popleft())
+
+
+def serve_lines(
+    index: ColumnIndex,
+    lines: Iterable[str],
+    out: TextIO,
+    tolerance: int = 0,
+    fmt: str = "list",
+) -> None:
+    # Exactly one response line per request line, in order, so clients can
+    # pipeline requests; bad requests get an error line instead of exiting.
+    cache: dict[int, str] = {}
+    for line in lines:
+        bits = line.replace(",", "").replace(" ", "").strip()
+        if len(bits) != index.ring_count or bits.strip("01"):
+            out.write(f"error: expected {index.ring_count} comma-separated 0/1 bits\n")
+        else:
+            text = cached_matches(cache, index, int(bits, 2), tolerance, fmt)
+            out.write(f"{{{text}}}\n" if fmt == "json" else text + "\n")
+        out.flush()
+
+
+def serve_socket(
+    index: ColumnIndex, path: str, tolerance: int = 0, fmt: str = "list"
+) -> None:
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self) -> None:
+            out = io.TextIOWrapper(self.wfile, encoding="utf-8", write_through=True)
+            lines = (raw.decode("utf-8", "replace") for raw in self.rfile)
+            serve_lines(index, lines, out, tolerance, fmt)
+
+    if os.path.exists(path):
+        # Only a stale socket from an earlier run may be replaced.
+        if not stat.S_ISSOCK(os.stat(path).st_mode):
+            raise SystemExit(f"{path} exists and is not a socket; refusing to replace it.")
+        os.unlink(path)
+    with socketserver.ThreadingUnixStreamServer(path, Handler) as server:
+        print(f"Serving decodes on {path}", file=sys.stderr)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            os.unlink(path)
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(
         description="Map a column of ring bits to angle(s) using pattern.json."
@@ -47,45 +1412,136 @@ def main() -> None:
         "--column",
         help='Comma-separated column bits (e.g. "1,0,1,0,1,0,1"). If omitted, read from stdin.',
     )
+    parser.add_argument(
+        "--input",
+        help='CSV of columns, one per line, to decode in bulk ("-" for stdin).',
+    )
+    parser.add_argument(
+        "--output",
+        help="Where to write row,angle(s) lines in --input mode (default: stdout).",
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=int,
+        default=0,
+        help="If no column matches exactly, return the closest ones within this "
+        "many flipped bits (default: 0). Adds a distance field in --input mode.",
+    )
+    parser.add_argument(
+        "--format",
+        choices=["list", "intervals", "json"],
+        default="list",
+        help="list: every matching angle; intervals: merged start-end ranges; "
+        "json: one object with the ranges (default: list).",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Decode an --input file in this many processes (default: 1).",
+    )
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help="Stay resident: answer one column per stdin line with one line of "
+        "angle(s) on stdout (empty if no match).",
+    )
+    parser.add_argument(
+        "--socket",
+        help="Like --serve, but accept connections on this Unix socket path.",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Do not read or write the compiled index next to the pattern (<pattern>.idx).",
+    )
     args = parser.parse_args()
 
+    if args.serve or args.socket:
+        decoder = Decoder(args.pattern, cache=not args.no_cache)
+        if args.socket:
+            serve_socket(decoder.index, args.socket, args.tolerance, args.format)
+        else:
+            serve_lines(decoder.index, sys.stdin, sys.stdout, args.tolerance, args.format)
+        return
+
+    if args.input:
+        if args.column:
+            raise SystemExit("--column and --input are mutually exclusive.")
+        if args.workers > 1 and args.input == "-":
+            raise SystemExit("--workers needs an --input file, not stdin.")
+        decoder = Decoder(args.pattern, cache=not args.no_cache)
+        ecc_counts: dict[str, int] = {}
+        out = open(args.output, "w", buffering=STREAM_BUFFER) if args.output else sys.stdout
+        try:
+            if args.workers > 1:
+                decode_file_parallel(
+                    args.pattern,
+                    args.input,
+                    out,
+                    args.workers,
+                    args.tolerance,
+                    cache=not args.no_cache,
+                    fmt=args.format,
+                    ecc_counts=ecc_counts,
+                )
+            elif args.input == "-":
+                decode_stream(
+                    decoder.index, sys.stdin, out, args.tolerance, fmt=args.format,
+                    ecc_counts=ecc_counts,
+                )
+            else:
+                with open(args.input, buffering=STREAM_BUFFER) as src:
+                    decode_stream(
+                        decoder.index, src, out, args.tolerance, fmt=args.format,
+                        ecc_counts=ecc_counts,
+                    )
+        finally:
+            if out is not sys.stdout:
+                out.close()
+        if ecc_counts:
+            summary = ", ".join(
+                f"{status} {ecc_counts.get(status, 0)}"
+                for status in ("clean", "corrected", "uncorrectable")
+            )
+            print(f"ECC reads: {summary}", file=sys.stderr)
+        return
+
     if args.column:
         column_text = args.column
     else:
         column_text = input("Enter column bits (comma-separated): ")
 
-    column = parse_column(column_text)
-    rings = load_rings(Path(args.pattern))
+    decoder = Decoder(args.pattern, cache=not args.no_cache)
+    try:
+        code = decoder.pack(column_text)
+    except ValueError as exc:
+        raise SystemExit(str(exc))
+    index = decoder.index
 
-    if len(column) != len(rings):
-        raise SystemExit(
-            f"Column length {len(column)} does not match ring count {len(rings)}."
-        )
+    if args.format == "json":
+        print("{" + format_matches(index, code, args.tolerance, "json") + "}")
+        return
 
-    ring_lengths = [len(r) for r in rings]
-    total_cols = lcm_list(ring_lengths)
-
-    matches = []
-    for i in range(total_cols):
-        ok = True
-        for ring_idx, ring in enumerate(rings):
-            segs = len(ring)
-            seg_len = total_cols // segs
-            idx = i // seg_len
-            if ring[idx] != column[ring_idx]:
-                ok = False
-                break
-        if ok:
-            angle = (i * 360.0) / total_cols
-            matches.append(angle)
-
-    if not matches:
+    if isinstance(index, EccIndex):
+        print(f"ECC: {index.correct(code)[1]}")
+    runs, distance = match_runs(index, code, args.tolerance)
+    if not runs:
         print("No matching angle found.")
         return
 
-    print(f"Matches: {len(matches)}")
-    for angle in matches:
-        print(f"{angle:.3f}°")
+    count = sum(hi - lo for lo, hi in runs)
+    if distance:
+        print(f"Nearest matches (distance {distance}): {count}")
+    else:
+        print(f"Matches: {count}")
+    if args.format == "intervals":
+        for lo, hi in runs_to_degrees(runs, index.total_cols):
+            print(f"{lo:.3f}° - {hi:.3f}°")
+    else:
+        for lo, hi in runs:
+            for col in range(lo, hi):
+                print(f"{(col * 360.0) / index.total_cols:.3f}°")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+import argparse
+import json
+from pathlib import Path
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from angle_from_column import Decoder
+
+SCRIPT = str(Path(__file__).resolve().with_name("angle_from_column.py"))
+
+
+def percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def summarize(name: str, latencies: list[float]) -> dict:
+    return {
+        "mode": name,
+        "requests": len(latencies),
+        "p50_ms": percentile(latencies, 50) * 1e3,
+        "p99_ms": percentile(latencies, 99) * 1e3,
+    }
+
+
+def bench_per_process(pattern: str, columns: list[str]) -> list[float]:
+    latencies = []
+    for column in columns:
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, SCRIPT, "--pattern", pattern, "--column", column],
+            check=True,
+            stdout=subprocess.DEVNULL,
+        )
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def bench_pipe(pattern: str, columns: list[str]) -> tuple[list[float], float]:
+    proc = subprocess.Popen(
+        [sys.executable, SCRIPT, "--pattern", pattern, "--serve"],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        text=True,
+        bufsize=1,
+    )
+    try:
+        latencies = []
+        for column in columns:
+            start = time.perf_counter()
+            proc.stdin.write(column + "\n")
+            proc.stdin.flush()
+            proc.stdout.readline()
+            latencies.append(time.perf_counter() - start)
+
+        # Pipelined: a writer thread keeps sending while the in-order responses
+        # are drained here, so neither side blocks on a full pipe buffer.
+        def send() -> None:
+            proc.stdin.write("".join(column + "\n" for column in columns))
+            proc.stdin.flush()
+
+        start = time.perf_counter()
+        writer = threading.Thread(target=send)
+        writer.start()
+        for _ in columns:
+            proc.stdout.readline()
+        pipelined = len(columns) / (time.perf_counter() - start)
+        writer.join()
+    finally:
+        proc.stdin.close()
+        proc.wait()
+    return latencies, pipelined
+
+
+def bench_socket(pattern: str, columns: list[str]) -> list[float]:
+    path = Path(tempfile.mkdtemp()) / "decode.sock"
+    proc = subprocess.Popen(
+        [sys.executable, SCRIPT, "--pattern", pattern, "--socket", str(path)],
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        deadline = time.monotonic() + 10
+        while not path.exists():
+            if time.monotonic() > deadline:
+                raise SystemExit("decode daemon did not open its socket")
+            time.sleep(0.01)
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn:
+            conn.connect(str(path))
+            reader = conn.makefile("r")
+            latencies = []
+            for column in columns:
+                start = time.perf_counter()
+                conn.sendall((column + "\n").encode())
+                reader.readline()
+                latencies.append(time.perf_counter() - start)
+    finally:
+        proc.terminate()
+        proc.wait()
+    return latencies
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compare per-process decode latency with the --serve/--socket daemon."
+    )
+    parser.add_argument(
+        "--pattern",
+        default="pattern.json",
+        help="Path to pattern.json (default: ./pattern.json).",
+    )
+    parser.add_argument(
+        "--process-runs",
+        type=int,
+        default=20,
+        help="Per-process invocations to time (default: 20).",
+    )
+    parser.add_argument(
+        "--requests",
+        type=int,
+        default=2000,
+        help="Daemon requests to time (default: 2000).",
+    )
+    args = parser.parse_args()
+
+    rings = Decoder(args.pattern).ring_count
+    columns = [
+        ",".join(random.choice("01") for _ in range(rings)) for _ in range(args.requests)
+    ]
+
+    results = [
+        summarize("per-process", bench_per_process(args.pattern, columns[: args.process_runs]))
+    ]
+    pipe_latencies, pipelined = bench_pipe(args.pattern, columns)
+    results.append(summarize("stdin", pipe_latencies) | {"pipelined_per_s": pipelined})
+    if hasattr(socket, "AF_UNIX"):
+        results.append(summarize("unix-socket", bench_socket(args.pattern, columns)))
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+import argparse
+import importlib.util
+import json
+from pathlib import Path
+import random
+import resource
+import subprocess
+import sys
+import time
+
+from angle_from_column import ColumnIndex, build_index_from_codes, decode_matrix
+from pattern_generation import build_codes
+
+# Metrics where larger is better; everything else (latency, time, memory)
+# regresses when it grows.
+HIGHER_IS_BETTER = {"single_per_s", "batch_per_s", "tolerant_per_s"}
+# Absolute changes below these are timer and allocator noise whatever their
+# ratio; throughputs are compared as time per decode, in seconds.
+NOISE_FLOORS = {
+    "build_s": 0.005,
+    "single_per_s": 0.5e-6,
+    "single_p50_us": 0.5,
+    "single_p99_us": 2.0,
+    "batch_per_s": 0.02e-6,
+    "tolerant_per_s": 2e-6,
+    "tolerant_p50_us": 2.0,
+    "tolerant_p99_us": 10.0,
+    "peak_rss_kb": 8192,
+}
+
+
+def percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def best_of(repeats: int, measure) -> float:
+    return min(measure() for _ in range(repeats))
+
+
+def time_lookups(lookup, queries: list[int], repeats: int) -> dict:
+    # Best of several passes for each figure, so one slow pass (a context
+    # switch, a GC pause) does not read as a regression.
+    runs = []
+    for _ in range(repeats):
+        latencies = []
+        start = time.perf_counter()
+        for code in queries:
+            t0 = time.perf_counter()
+            lookup(code)
+            latencies.append(time.perf_counter() - t0)
+        runs.append((time.perf_counter() - start, latencies))
+    return {
+        "per_s": len(queries) / min(elapsed for elapsed, _ in runs),
+        "p50_us": min(percentile(latencies, 50) for _, latencies in runs) * 1e6,
+        "p99_us": min(percentile(latencies, 99) for _, latencies in runs) * 1e6,
+    }
+
+
+def run_case(sections: int, order: str, queries: int, batch: int, repeats: int) -> dict:
+    rng = random.Random(sections)
+    pattern_codes = build_codes(sections, order)
+
+    def build():
+        start = time.perf_counter()
+        build_index_from_codes(pattern_codes, sections, order)
+        return time.perf_counter() - start
+
+    build_s = best_of(repeats, build)
+    index = build_index_from_codes(pattern_codes, sections, order)
+
+    codes = [rng.getrandbits(sections) for _ in range(queries)]
+    single = time_lookups(index.lookup, codes, repeats)
+
+    batch_per_s = None
+    if importlib.util.find_spec("numpy") is not None:
+        import numpy as np
+
+        matrix = np.random.default_rng(sections).integers(
+            0, 2, size=(batch, sections), dtype=np.uint8
+        )
+        decode_matrix(index, matrix[:1])
+
+        def decode():
+            start = time.perf_counter()
+            decode_matrix(index, matrix)
+            return time.perf_counter() - start
+
+        batch_per_s = batch / best_of(repeats, decode)
+    # ru_maxrss is in KiB on Linux; taken before the tolerant index below,
+    # which is only there to time nearest().
+    peak_rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # Every code of a full Gray/binary pattern matches exactly, so time the
+    # tolerant search on every other column: half the codes are then missing.
+    sparse = ColumnIndex.from_codes(pattern_codes[::2], sections)
+    sparse.nearest(codes[0], 2)
+    tolerant = time_lookups(lambda code: sparse.nearest(code, 2), codes, repeats)
+
+    return {
+        "sections": sections,
+        "order": order,
+        "index": type(index).__name__,
+        "build_s": build_s,
+        "single_per_s": single["per_s"],
+        "single_p50_us": single["p50_us"],
+        "single_p99_us": single["p99_us"],
+        "batch_per_s": batch_per_s,
+        "tolerant_per_s": tolerant["per_s"],
+        "tolerant_p50_us": tolerant["p50_us"],
+        "tolerant_p99_us": tolerant["p99_us"],
+        "peak_rss_kb": peak_rss_kb,
+    }
+
+
+def parse_range(text: str) -> list[int]:
+    lo, _, hi = text.partition("-")
+    return list(range(int(lo), int(hi or lo) + 1))
+
+
+def compare(results: list[dict], baseline: list[dict], threshold: float) -> list[str]:
+    previous = {(r["sections"], r["order"]): r for r in baseline}
+    regressions = []
+    for result in results:
+        base = previous.get((result["sections"], result["order"]))
+        if base is None:
+            continue
+        for key, value in result.items():
+            old = base.get(key)
+            if not isinstance(value, (int, float)) or not isinstance(old, (int, float)):
+                continue
+            if key == "sections" or old <= 0 or value <= 0:
+                continue
+            if key in HIGHER_IS_BETTER:
+                worse = value < old * (1 - threshold)
+                change = 1 / value - 1 / old
+            else:
+                worse = value > old * (1 + threshold)
+                change = value - old
+            if worse and change > NOISE_FLOORS.get(key, 0):
+                regressions.append(
+                    f"{result['sections']}-bit {result['order']} {key}: {old:.4g} -> {value:.4g}"
+                )
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Benchmark index build, single, batch and tolerant decodes."
+    )
+    parser.add_argument(
+        "--sections",
+        default="3-24",
+        help="Section (ring) counts to run, e.g. 3-16 or 12 (default: 3-24).",
+    )
+    parser.add_argument(
+        "--orders",
+        default="gray,binary",
+        help="Comma-separated orders to run (default: gray,binary).",
+    )
+    parser.add_argument(
+        "--queries",
+        type=int,
+        default=20000,
+        help="Single and tolerant decodes per case (default: 20000).",
+    )
+    parser.add_argument(
+        "--batch",
+        type=int,
+        default=1_000_000,
+        help="Columns per batch decode (default: 1000000).",
+    )
+    parser.add_argument(
+        "--repeats",
+        type=int,
+        default=5,
+        help="Passes per measurement; the best one is reported (default: 5).",
+    )
+    parser.add_argument(
+        "--output",
+        help="Also write the JSON report to this path (e.g. to use as a baseline).",
+    )
+    parser.add_argument(
+        "--baseline",
+        help="Report JSON from an earlier run; exit 1 if any metric regressed.",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="Relative change that counts as a regression (default: 0.2).",
+    )
+    parser.add_argument("--case", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        sections, order = int(args.case[0]), args.case[1]
+        print(json.dumps(run_case(sections, order, args.queries, args.batch, args.repeats)))
+        return
+
+    results = []
+    for sections in parse_range(args.sections):
+        for order in args.orders.split(","):
+            # One process per case so peak RSS belongs to that case alone.
+            proc = subprocess.run(
+                [
+                    sys.executable,
+                    __file__,
+                    "--case",
+                    str(sections),
+                    order,
+                    "--queries",
+                    str(args.queries),
+                    "--batch",
+                    str(args.batch),
+                    "--repeats",
+                    str(args.repeats),
+                ],
+                check=True,
+                capture_output=True,
+                text=True,
+            )
+            results.append(json.loads(proc.stdout))
+            print(
+                f"{sections:2d}-bit {order:6s} build {results[-1]['build_s']:.3f}s",
+                file=sys.stderr,
+            )
+
+    report = {"python": sys.version.split()[0], "results": results}
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())["results"]
+        report["regressions"] = compare(results, baseline, args.threshold)
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        Path(args.output).write_text(text + "\n")
+    if report.get("regressions"):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+import argparse
+from array import array
+import mmap
+from pathlib import Path
+import struct
+import sys
+
+from angle_from_column import gray_decode
+
+# File layout (little-endian): magic, min/max bit width, one byte offset per
+# width, then for each width a uint32 table of 2**bits entries indexed by code.
+LUT_MAGIC = b"GRAYLUT1"
+LUT_HEADER = struct.Struct("<8sII")
+
+
+def ccw_index(code: int, bits: int) -> int:
+    # Same convention as gray_lookup_ccw_3_to_12.txt: counter-clockwise from
+    # 3 o'clock, so position i shows the Gray code of column -i.
+    return -gray_decode(code, bits) % (1 << bits)
+
+
+def build_table(bits: int) -> array:
+    try:
+        import numpy as np
+    except ImportError:
+        return array("I", (ccw_index(code, bits) for code in range(1 << bits)))
+    positions = np.arange(1 << bits, dtype=np.uint32)
+    cols = (-positions.astype(np.int64)) % (1 << bits)
+    table = np.empty(1 << bits, dtype=np.uint32)
+    table[cols ^ (cols >> 1)] = positions
+    return array("I", table.tobytes())
+
+
+def write_luts(path: Path, min_bits: int, max_bits: int) -> None:
+    widths = range(min_bits, max_bits + 1)
+    offset = LUT_HEADER.size + 8 * len(widths)
+    offsets = []
+    for bits in widths:
+        offsets.append(offset)
+        offset += 4 << bits
+    with open(path, "wb") as handle:
+        handle.write(LUT_HEADER.pack(LUT_MAGIC, min_bits, max_bits))
+        handle.write(struct.pack(f"<{len(offsets)}Q", *offsets))
+        for bits in widths:
+            table = build_table(bits)
+            if sys.byteorder != "little":
+                table.byteswap()
+            handle.write(table.tobytes())
+            print(f"  {bits:2d}-bit: {1 << bits} entries", file=sys.stderr)
+
+
+class GrayLut:
+    # Zero-copy reader: every width's table is a memoryview into one mmap.
+    def __init__(self, path: str | Path) -> None:
+        with open(path, "rb") as handle:
+            self._map = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.min_bits, self.max_bits = LUT_HEADER.unpack_from(self._map)
+        if magic != LUT_MAGIC:
+            raise SystemExit(f"{path} is not a Gray lookup table file")
+        count = self.max_bits - self.min_bits + 1
+        self._offsets = struct.unpack_from(f"<{count}Q", self._map, LUT_HEADER.size)
+        self._tables: dict[int, memoryview | array] = {}
+
+    def table(self, bits: int) -> memoryview | array:
+        if not self.min_bits <= bits <= self.max_bits:
+            raise KeyError(f"no {bits}-bit table (have {self.min_bits}-{self.max_bits})")
+        table = self._tables.get(bits)
+        if table is None:
+            start = self._offsets[bits - self.min_bits]
+            table = memoryview(self._map)[start : start + (4 << bits)].cast("I")
+            if sys.byteorder != "little":
+                table = array("I", table)
+                table.byteswap()
+            self._tables[bits] = table
+        return table
+
+    def lookup(self, code: int | str, bits: int | None = None) -> int:
+        # Accepts a packed code (with bits) or a bit string like "0110".
+        if isinstance(code, str):
+            bits = len(code)
+            code = int(code, 2)
+        return self.table(bits)[code]
+
+
+def parse_text_lut(path: Path) -> dict[int, dict[int, int]]:
+    tables: dict[int, dict[int, int]] = {}
+    for line in path.read_text().splitlines():
+        if "->" not in line:
+            continue
+        bit_text, _, index_text = line.partition("->")
+        bit_text = bit_text.strip()
+        tables.setdefault(len(bit_text), {})[int(bit_text, 2)] = int(index_text)
+    return tables
+
+
+def verify_text(lut: GrayLut, path: Path) -> int:
+    mismatches = 0
+    for bits, entries in sorted(parse_text_lut(path).items()):
+        table = lut.table(bits)
+        bad = [code for code, index in entries.items() if table[code] != index]
+        if len(entries) != 1 << bits:
+            print(f"{bits}-bit: text has {len(entries)} of {1 << bits} codes")
+            mismatches += 1
+        if bad:
+            print(f"{bits}-bit: {len(bad)} mismatches, e.g. code {bad[0]:0{bits}b}")
+            mismatches += len(bad)
+        else:
+            print(f"{bits}-bit: ok")
+    return mismatches
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Write binary Gray code -> CCW position lookup tables, or check "
+        "the text table against them."
+    )
+    parser.add_argument(
+        "--output",
+        default="gray_lut_ccw.bin",
+        help="Binary table file (default: gray_lut_ccw.bin).",
+    )
+    parser.add_argument(
+        "--min-bits",
+        type=int,
+        default=3,
+        help="Smallest code width (default: 3).",
+    )
+    parser.add_argument(
+        "--max-bits",
+        type=int,
+        default=24,
+        help="Largest code width (default: 24).",
+    )
+    parser.add_argument(
+        "--verify",
+        metavar="TXT",
+        help="Compare a text table (e.g. gray_lookup_ccw_3_to_12.txt) against the "
+        "binary file instead of writing it.",
+    )
+    args = parser.parse_args()
+
+    out_path = Path(args.output)
+    if args.verify:
+        mismatches = verify_text(GrayLut(out_path), Path(args.verify))
+        if mismatches:
+            raise SystemExit(1)
+        return
+
+    if not 1 <= args.min_bits <= args.max_bits <= 32:
+        raise SystemExit("need 1 <= min-bits <= max-bits <= 32")
+    write_luts(out_path, args.min_bits, args.max_bits)
+    print(f"Wrote {out_path} with {args.min_bits}-{args.max_bits} bit tables")
+
+
+if __name__ == "__main__":
+    main()
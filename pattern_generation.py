@@ -1,28 +1,416 @@
 #!/usr/bin/env python3
 import argparse
+from array import array
+import base64
+import importlib.util
 import json
 from pathlib import Path
+import struct
+import sys
+import time
+
+# Columns per ring_chunks() block: 16 rings x 64K columns is ~1 MB of bits.
+CHUNK_COLUMNS = 1 << 16
+# Columns per block when streaming a pattern file ring by ring.
+STREAM_CHUNK_COLUMNS = 1 << 20
+STREAM_BUFFER = 1 << 20
+# Packed .bin layout: magic, uint32 LE header length, JSON header (the
+# pattern.json fields minus "rings", plus "ring_lengths"), then each ring's
+# bits MSB-first, padded to a whole byte.
+PATTERN_MAGIC = b"GCPAT1\n"
+PATTERN_FORMATS = ("json", "packed", "bin")
 
 
 def gray_code(value: int) -> int:
     return value ^ (value >> 1)
 
 
-def build_rings(sections: int, order: str) -> list[list[int]]:
-    columns = 1 << sections
-    rings = [[] for _ in range(sections)]
+def code_typecode(bits: int) -> str:
+    # Smallest unsigned array type that holds a bits-wide column code.
+    if bits <= 8:
+        return "B"
+    if bits <= 16:
+        return "H"
+    return "I" if bits <= 32 else "Q"
+
+
+def build_codes(sections: int, order: str) -> array:
+    # One packed code per column, ring 0 as the most significant bit.
+    columns = range(1 << sections)
+    if order == "gray":
+        return array(code_typecode(sections), (gray_code(col) for col in columns))
+    return array(code_typecode(sections), columns)
+
+
+def is_order_codes(codes, sections: int, order: str) -> bool:
+    # codes == build_codes(sections, order), compared without building it.
+    if len(codes) != 1 << sections:
+        return False
+    try:
+        import numpy as np
+    except ImportError:
+        return codes == build_codes(sections, order)
+    cols = np.arange(1 << sections, dtype=np.uint64)
+    expected = cols ^ (cols >> np.uint64(1)) if order == "gray" else cols
+    return bool(np.array_equal(np.asarray(codes), expected))
 
-    for col in range(columns):
-        code = gray_code(col) if order == "gray" else col
-        for bit in range(sections):
-            # Ring 0 is MSB (inner), last ring is LSB (outer).
-            ring_idx = bit
-            bit_idx = sections - 1 - bit
-            rings[ring_idx].append((code >> bit_idx) & 1)
 
+def codes_to_rings(codes, sections: int) -> list[list[int]]:
+    rings = []
+    for ring_idx in range(sections):
+        # Ring 0 is MSB (inner), last ring is LSB (outer).
+        bit_idx = sections - 1 - ring_idx
+        rings.append([(code >> bit_idx) & 1 for code in codes])
     return rings
 
 
+def ecc_masks(sections: int, ecc: str) -> list[int]:
+    # Data bits covered by each check bit (check bit j = bit j of the check
+    # code). parity: one even-parity bit. hamming: bit j covers the data bits
+    # whose Hamming position has bit j set, so a single flipped data bit
+    # shows up as its position in the syndrome.
+    if ecc == "parity":
+        return [(1 << sections) - 1]
+    if ecc != "hamming":
+        raise SystemExit(f"unknown ecc scheme {ecc!r}")
+    checks = 1
+    while (1 << checks) < sections + checks + 1:
+        checks += 1
+    masks = [0] * checks
+    position = 2
+    for bit in range(sections - 1, -1, -1):
+        position += 1
+        while position & (position - 1) == 0:
+            position += 1
+        for j in range(checks):
+            if position >> j & 1:
+                masks[j] |= 1 << bit
+    return masks
+
+
+def ecc_check(code: int, masks: list[int]) -> int:
+    return sum(((code & mask).bit_count() & 1) << j for j, mask in enumerate(masks))
+
+
+def ecc_rings(codes, masks: list[int]) -> list[list[int]]:
+    checks = array(code_typecode(len(masks)), (ecc_check(code, masks) for code in codes))
+    return codes_to_rings(checks, len(masks))
+
+
+def ecc_check_array(codes, masks: list[int]):
+    # Vectorized ecc_check: parity of each masked code by XOR-folding.
+    import numpy as np
+
+    checks = np.zeros_like(codes)
+    for j, mask in enumerate(masks):
+        folded = codes & np.uint64(mask)
+        for shift in (32, 16, 8, 4, 2, 1):
+            folded ^= folded >> np.uint64(shift)
+        checks |= (folded & np.uint64(1)) << np.uint64(j)
+    return checks
+
+
+def split_ecc_codes(codes, data_rings: int, masks: list[int]) -> array | None:
+    # Data-ring codes of data+check columns, or None if any column's check
+    # bits do not follow masks.
+    checks = len(masks)
+    typecode = code_typecode(data_rings)
+    try:
+        import numpy as np
+    except ImportError:
+        data = array(typecode, (code >> checks for code in codes))
+        check_mask = (1 << checks) - 1
+        if any((code & check_mask) != ecc_check(d, masks) for code, d in zip(codes, data)):
+            return None
+        return data
+    full = np.asarray(codes).astype(np.uint64)
+    data = full >> np.uint64(checks)
+    if not np.array_equal(full & np.uint64((1 << checks) - 1), ecc_check_array(data, masks)):
+        return None
+    return array(typecode, data.astype(typecode).tobytes())
+
+
+def ring_chunks(
+    sections: int, order: str, ecc: str | None = None, chunk_columns: int = CHUNK_COLUMNS
+):
+    # uint8 (rings, columns) matrices for successive column ranges, so a
+    # pattern is never held in memory all at once. Needs numpy.
+    import numpy as np
+
+    masks = ecc_masks(sections, ecc) if ecc else []
+    ring_count = sections + len(masks)
+    shifts = np.arange(ring_count - 1, -1, -1, dtype=np.uint64)[:, None]
+    total = 1 << sections
+    for start in range(0, total, chunk_columns):
+        cols = np.arange(start, min(start + chunk_columns, total), dtype=np.uint64)
+        codes = cols ^ (cols >> np.uint64(1)) if order == "gray" else cols
+        if masks:
+            codes = (codes << np.uint64(len(masks))) | ecc_check_array(codes, masks)
+        yield ((codes[None, :] >> shifts) & np.uint64(1)).astype(np.uint8)
+
+
+def ring_bit_chunks(
+    sections: int, order: str, ecc: str | None = None, chunk_columns: int = STREAM_CHUNK_COLUMNS
+):
+    # (ring, uint8 bits) blocks in file order: ring by ring, then column
+    # chunk by chunk. Needs numpy.
+    import numpy as np
+
+    masks = ecc_masks(sections, ecc) if ecc else []
+    total = 1 << sections
+    for ring in range(sections + len(masks)):
+        for start in range(0, total, chunk_columns):
+            cols = np.arange(start, min(start + chunk_columns, total), dtype=np.uint64)
+            codes = cols ^ (cols >> np.uint64(1)) if order == "gray" else cols
+            if ring < sections:
+                shift = sections - 1 - ring
+            else:
+                codes = ecc_check_array(codes, masks)
+                shift = len(masks) - 1 - (ring - sections)
+            yield ring, ((codes >> np.uint64(shift)) & np.uint64(1)).astype(np.uint8)
+
+
+def build_ring_matrix(sections: int, order: str, ecc: str | None = None):
+    import numpy as np
+
+    return np.concatenate(list(ring_chunks(sections, order, ecc)), axis=1)
+
+
+def build_rings(sections: int, order: str, ecc: str | None = None) -> list[list[int]]:
+    # With ecc, check rings follow the data rings (outermost last).
+    try:
+        return build_ring_matrix(sections, order, ecc).tolist()
+    except ImportError:
+        pass
+    codes = build_codes(sections, order)
+    rings = codes_to_rings(codes, sections)
+    if ecc:
+        rings += ecc_rings(codes, ecc_masks(sections, ecc))
+    return rings
+
+
+def vernier_phase_bits(periods: list[int]) -> int:
+    # Enough phase resolution that the beat between neighbouring tracks pins
+    # the period with margin: 2**bits >= 4 * the longest period.
+    bits = 1
+    while (1 << bits) < 4 * max(periods):
+        bits += 1
+    return bits
+
+
+def check_vernier_periods(periods: list[int]) -> None:
+    if len(periods) < 2:
+        raise SystemExit("vernier needs at least two periods")
+    if any(p <= 0 for p in periods):
+        raise SystemExit("periods must be > 0")
+    if len(set(periods)) != len(periods):
+        raise SystemExit("periods must be distinct")
+    for i, a in enumerate(periods):
+        for b in periods[i + 1 :]:
+            x, y = a, b
+            while y:
+                x, y = y, x % y
+            if x != 1:
+                raise SystemExit(f"periods {a} and {b} are not coprime")
+
+
+def build_vernier_rings(periods: list[int], phase_bits: int) -> list[list[int]]:
+    # One track per period: phase_bits Gray rings (MSB first) that count the
+    # phase within a period, repeated `period` times around the disk.
+    phase_rings = codes_to_rings(build_codes(phase_bits, "gray"), phase_bits)
+    return [ring * period for period in periods for ring in phase_rings]
+
+
+def descriptor_rings(data: dict) -> list[list[int]]:
+    # Rings of a procedural pattern, which stores only how to generate them.
+    if data.get("scheme") == "vernier":
+        return build_vernier_rings(data["periods"], data["phase_bits"])
+    return build_rings(data["sections"], data.get("order", "gray"), data.get("ecc"))
+
+
+def pack_ring(ring) -> bytes:
+    if not len(ring):
+        return b""
+    pad = -len(ring) % 8
+    value = int("".join(map(str, ring)), 2) << pad
+    return value.to_bytes((len(ring) + pad) // 8, "big")
+
+
+def unpack_rings(body: bytes, ring_lengths: list[int]) -> list[list[int]]:
+    # Ring lists are only needed for rings of unequal length or callers that
+    # want them; the index goes through unpack_codes().
+    try:
+        import numpy as np
+    except ImportError:
+        np = None
+    rings = []
+    offset = 0
+    for length in ring_lengths:
+        size = (length + 7) // 8
+        if np is not None:
+            packed = np.frombuffer(body, dtype=np.uint8, count=size, offset=offset)
+            rings.append(np.unpackbits(packed, count=length).tolist())
+        else:
+            value = int.from_bytes(body[offset : offset + size], "big")
+            rings.append(list(map(int, format(value, f"0{size * 8}b")[:length])))
+        offset += size
+    return rings
+
+
+def unpack_codes(body: bytes, ring_lengths: list[int]) -> array:
+    # Packed rings of one common length -> one code per column, ring 0 as
+    # the MSB, without going through per-bit ring lists.
+    length = ring_lengths[0]
+    typecode = code_typecode(len(ring_lengths))
+    try:
+        import numpy as np
+    except ImportError:
+        codes = [0] * length
+        for ring in unpack_rings(body, ring_lengths):
+            codes = [(code << 1) | bit for code, bit in zip(codes, ring)]
+        return array(typecode, codes)
+    size = (length + 7) // 8
+    codes = np.zeros(length, dtype=np.uint64)
+    for ring in range(len(ring_lengths)):
+        packed = np.frombuffer(body, dtype=np.uint8, count=size, offset=ring * size)
+        codes <<= np.uint64(1)
+        codes |= np.unpackbits(packed, count=length)
+    return array(typecode, codes.astype(typecode).tobytes())
+
+
+def pattern_bytes(payload: dict, fmt: str = "json") -> bytes:
+    # json: one bit per line, as before. packed: the same JSON with the rings
+    # base64-packed as "rings_packed". bin: PATTERN_MAGIC layout.
+    if fmt == "json":
+        return (json.dumps(payload, indent=2) + "\n").encode()
+    rings = payload["rings"]
+    header = {key: value for key, value in payload.items() if key != "rings"}
+    header["ring_lengths"] = [len(ring) for ring in rings]
+    body = b"".join(pack_ring(ring) for ring in rings)
+    if fmt == "packed":
+        header["rings_packed"] = base64.b64encode(body).decode("ascii")
+        return (json.dumps(header, indent=2) + "\n").encode()
+    head = json.dumps(header).encode()
+    return PATTERN_MAGIC + struct.pack("<I", len(head)) + head + body
+
+
+def json_bit_lines(bits, first: bool) -> bytes:
+    # The json.dumps(indent=2) rendering of ring bits: ",\n      <bit>" each.
+    import numpy as np
+
+    cells = np.empty((len(bits), 9), dtype=np.uint8)
+    cells[:] = np.frombuffer(b",\n      0", dtype=np.uint8)
+    cells[:, 8] += bits
+    data = cells.tobytes()
+    return data[1:] if first else data
+
+
+def write_pattern_stream(
+    path: Path,
+    payload: dict,
+    sections: int,
+    order: str,
+    ecc: str | None = None,
+    fmt: str = "json",
+    chunk_columns: int = STREAM_CHUNK_COLUMNS,
+    codes=None,
+) -> int:
+    # Same bytes as pattern_bytes({"rings": ...} | payload, fmt), written one
+    # ring chunk at a time so memory stays bounded by chunk_columns. Returns
+    # the number of bytes written. If given a uint64 array of 2**sections
+    # entries, codes also collects the column codes of what was written.
+    import numpy as np
+
+    ring_count = sections + (len(ecc_masks(sections, ecc)) if ecc else 0)
+    total = 1 << sections
+    header = dict(payload)
+    header["ring_lengths"] = [total] * ring_count
+    started = last_report = time.monotonic()
+    done = 0
+    written = 0
+    carry = b""
+    spare = np.zeros(0, dtype=np.uint8)
+    with open(path, "wb", buffering=STREAM_BUFFER) as handle:
+
+        def emit(data: bytes) -> None:
+            nonlocal written
+            handle.write(data)
+            written += len(data)
+
+        if fmt == "json":
+            emit(b'{\n  "rings": [\n')
+        elif fmt == "packed":
+            emit(json.dumps(header, indent=2)[:-2].encode() + b',\n  "rings_packed": "')
+        else:
+            head = json.dumps(header).encode()
+            emit(PATTERN_MAGIC + struct.pack("<I", len(head)) + head)
+
+        for ring, bits in ring_bit_chunks(sections, order, ecc, chunk_columns):
+            first = done % total == 0
+            if codes is not None:
+                col = done % total
+                block = codes[col : col + len(bits)]
+                block <<= np.uint64(1)
+                block |= bits
+            if fmt == "json":
+                if first:
+                    emit(b"    [")
+                emit(json_bit_lines(bits, first))
+            else:
+                # Whole bytes only until the ring ends; leftover bits (chunk
+                # sizes that are not a multiple of 8) wait for the next chunk.
+                pending = np.concatenate((spare, bits))
+                cut = len(pending) if (done + len(bits)) % total == 0 else len(pending) & ~7
+                spare = pending[cut:]
+                packed = np.packbits(pending[:cut]).tobytes()
+                if fmt == "packed":
+                    # base64 in whole 3-byte groups; the rest waits for the next chunk.
+                    packed = carry + packed
+                    cut = len(packed) - len(packed) % 3
+                    carry = packed[cut:]
+                    packed = base64.b64encode(packed[:cut])
+                emit(packed)
+            done += len(bits)
+            if fmt == "json" and done % total == 0:
+                emit(b"\n    ],\n" if ring < ring_count - 1 else b"\n    ]\n")
+            now = time.monotonic()
+            if now - last_report >= 0.5:
+                last_report = now
+                print(
+                    f"\r  ring {ring + 1}/{ring_count}  {done / (now - started) / 1e6:.1f} Mbit/s"
+                    f"  {written / 1e6:.1f} MB",
+                    end="",
+                    file=sys.stderr,
+                )
+
+        if fmt == "json":
+            emit(b"  ]," + json.dumps(payload, indent=2)[1:].encode() + b"\n")
+        elif fmt == "packed":
+            emit(base64.b64encode(carry) + b'"\n}\n')
+    elapsed = time.monotonic() - started
+    print(
+        f"\r  {done} bits in {elapsed:.1f}s ({done / max(elapsed, 1e-9) / 1e6:.1f} Mbit/s),"
+        f" {written / 1e6:.1f} MB",
+        file=sys.stderr,
+    )
+    return written
+
+
+def parse_pattern(raw: bytes) -> dict:
+    # Any pattern_bytes() format; packed rings stay bytes in "rings_packed"
+    # until someone asks for the ring lists.
+    if raw.startswith(PATTERN_MAGIC):
+        start = len(PATTERN_MAGIC) + 4
+        (size,) = struct.unpack_from("<I", raw, len(PATTERN_MAGIC))
+        data = json.loads(raw[start : start + size])
+        data["rings_packed"] = raw[start + size :]
+        return data
+    data = json.loads(raw)
+    if isinstance(data.get("rings_packed"), str):
+        data["rings_packed"] = base64.b64decode(data["rings_packed"])
+    return data
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(
         description="Generate a radial pattern.json with unique columns."
@@ -30,7 +418,26 @@ def main() -> None:
     parser.add_argument(
         "sections",
         type=int,
-        help="Number of radial sections (rings).",
+        nargs="?",
+        help="Number of radial sections (rings); gray/binary scheme only.",
+    )
+    parser.add_argument(
+        "--scheme",
+        choices=["gray", "vernier"],
+        default="gray",
+        help="gray: one 2**sections column code (default); vernier: periodic "
+        "tracks with coprime periods.",
+    )
+    parser.add_argument(
+        "--periods",
+        default="31,32,33",
+        help="Comma-separated track periods for --scheme vernier (default: 31,32,33).",
+    )
+    parser.add_argument(
+        "--phase-bits",
+        type=int,
+        help="Gray rings per vernier track (default: smallest with 2**bits >= "
+        "4 * the longest period).",
     )
     parser.add_argument(
         "--order",
@@ -38,26 +445,118 @@ def main() -> None:
         default="gray",
         help="Column ordering (default: gray).",
     )
+    parser.add_argument(
+        "--ecc",
+        choices=["parity", "hamming"],
+        help="Append check rings: parity (detects single-bit errors) or hamming "
+        "(corrects them). gray/binary scheme only.",
+    )
+    parser.add_argument(
+        "--format",
+        choices=PATTERN_FORMATS,
+        default="json",
+        help="json: one bit per line; packed: JSON with base64 bit-packed rings; "
+        "bin: binary header plus bit-packed rings (default: json).",
+    )
+    parser.add_argument(
+        "--procedural",
+        action="store_true",
+        help="Write only the generator parameters (sections/order or periods); "
+        "loaders compute the rings on demand.",
+    )
+    parser.add_argument(
+        "--no-validate",
+        action="store_true",
+        help="Skip the uniqueness/Hamming distance check after writing.",
+    )
     parser.add_argument(
         "--output",
-        default="pattern.json",
-        help="Output path (default: pattern.json).",
+        help="Output path (default: pattern.json, or pattern.bin with --format bin).",
     )
     args = parser.parse_args()
 
-    if args.sections <= 0:
-        raise SystemExit("sections must be > 0")
+    if args.procedural and args.format != "json":
+        raise SystemExit("--procedural patterns are JSON descriptors; drop --format")
+
+    if args.scheme == "vernier":
+        if args.ecc:
+            raise SystemExit("--ecc is only supported with the gray scheme")
+        periods = [int(p) for p in args.periods.split(",") if p.strip()]
+        check_vernier_periods(periods)
+        phase_bits = args.phase_bits or vernier_phase_bits(periods)
+        if phase_bits <= 0:
+            raise SystemExit("phase-bits must be > 0")
+        ring_count = len(periods) * phase_bits
+        rings = None if args.procedural else build_vernier_rings(periods, phase_bits)
+        columns = 1 << phase_bits
+        for period in periods:
+            columns *= period
+        payload = {
+            "rings": rings,
+            "columns": columns,
+            "scheme": "vernier",
+            "periods": periods,
+            "phase_bits": phase_bits,
+        }
+    else:
+        if args.sections is None or args.sections <= 0:
+            raise SystemExit("sections must be > 0")
+        ring_count = args.sections + (len(ecc_masks(args.sections, args.ecc)) if args.ecc else 0)
+        # With numpy, rings go straight to the file chunk by chunk instead.
+        stream = not args.procedural and importlib.util.find_spec("numpy") is not None
+        if args.procedural or stream:
+            rings = None
+        else:
+            rings = build_rings(args.sections, args.order, args.ecc)
+        payload = {
+            "rings": rings,
+            "columns": 1 << args.sections,
+            "order": args.order,
+        }
+        if args.ecc:
+            payload["ecc"] = args.ecc
+            payload["data_rings"] = args.sections
+        if args.procedural:
+            payload["sections"] = args.sections
+
+    if args.procedural:
+        del payload["rings"]
+        payload["procedural"] = True
+    out_path = Path(args.output or ("pattern.bin" if args.format == "bin" else "pattern.json"))
+    validate = not args.no_validate and importlib.util.find_spec("numpy") is not None
+    codes = None
+    if rings is None and not args.procedural:
+        del payload["rings"]
+        if validate:
+            import numpy as np
+
+            codes = np.zeros(1 << args.sections, dtype=np.uint64)
+        write_pattern_stream(
+            out_path, payload, args.sections, args.order, args.ecc, args.format, codes=codes
+        )
+    else:
+        out_path.write_bytes(pattern_bytes(payload, args.format))
+    print(f"Wrote {out_path} with {ring_count} rings and {payload['columns']} columns")
 
-    rings = build_rings(args.sections, args.order)
-    payload = {
-        "rings": rings,
-        "columns": 1 << args.sections,
-        "order": args.order,
-    }
+    if args.no_validate:
+        return
+    if not validate:
+        print("Skipping validation (needs numpy).", file=sys.stderr)
+        return
+    import pattern_validate
 
-    out_path = Path(args.output)
-    out_path.write_text(json.dumps(payload, indent=2) + "\n")
-    print(f"Wrote {out_path} with {len(rings)} rings and {payload['columns']} columns")
+    try:
+        if codes is not None:
+            report = pattern_validate.validate_codes(codes, ring_count)
+        else:
+            report = pattern_validate.validate_pattern_data(payload)
+    except (MemoryError, OverflowError) as exc:
+        # Too big to check here (or codes wider than 64 bits). The pattern is
+        # already written, but scripted runs still have to see a failure.
+        raise SystemExit(f"{out_path} was written but could not be validated: {exc!r}")
+    print(pattern_validate.format_report(report))
+    if report["duplicates"]:
+        raise SystemExit(f"{out_path} has duplicate columns")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+import argparse
+import math
+import os
+from pathlib import Path
+import struct
+import sys
+import threading
+import zlib
+
+# Same look as renderRadialPattern in binary_radial_pattern.html.
+BACKGROUND = (0xEE, 0xEE, 0xEE)
+PALETTE = [BACKGROUND, (0, 0, 0), (0xFF, 0xFF, 0xFF), (0, 0, 0xFF)]
+BG, BLACK, WHITE, BLUE = range(4)
+CENTER_GAP_PERCENT = 90
+RENDER_CACHE = Path(__file__).resolve().with_name(".render_cache")
+# Rows rasterized per block; bounds memory at 10k+ px widths.
+BAND_ROWS = 256
+# SVG grows about 4x per section (one path per run of 1 bits): ~5 MB at 16.
+MAX_SVG_SECTIONS = 16
+# Image sizes /render accepts; each one is a separate cached file.
+RENDER_SIZES = (500, 1000, 2000, 4000, 8000, 16000)
+
+
+def disk_layout(size: int, ring_count: int) -> tuple[float, float, float, float]:
+    # (pattern radius, center gap radius, ring width, marker width): a border,
+    # then a marker ring outside the pattern, as the browser page draws it.
+    border = min(50, size // 10)
+    ratio = (1 - CENTER_GAP_PERCENT / 100) / ring_count
+    radius = (size / 2 - border) / (1 + 2 * ratio)
+    marker = radius * ratio
+    if marker < 2:
+        marker = 2.0
+        radius = size / 2 - border - 2 * marker
+    gap = radius * CENTER_GAP_PERCENT / 100
+    return radius, gap, (radius - gap) / ring_count, marker
+
+
+def column_bit(code, sections: int, ring, invert: bool, reverse: bool):
+    # generateRings(): ring 0 is the MSB unless reversed, then optionally inverted.
+    bit_idx = ring if reverse else sections - 1 - ring
+    return ((code >> bit_idx) & 1) ^ int(invert)
+
+
+def raster_bands(sections: int, order: str, size: int, invert: bool, reverse: bool):
+    # Palette-index rows of the disk, BAND_ROWS at a time. Each pixel's ring
+    # and column come from its polar coordinates; its bit from the column code.
+    import numpy as np
+
+    columns = 1 << sections
+    radius, gap, ring_width, marker = disk_layout(size, sections)
+    center = size / 2
+    xs = np.arange(size, dtype=np.float64) + 0.5 - center
+    for top in range(0, size, BAND_ROWS):
+        ys = np.arange(top, min(top + BAND_ROWS, size), dtype=np.float64)[:, None] + 0.5 - center
+        dist = np.hypot(xs[None, :], ys)
+        band = np.full(dist.shape, BG, dtype=np.uint8)
+        band[(dist >= max(0.0, gap - marker)) & (dist < gap)] = BLUE
+        band[(dist >= radius) & (dist < radius + marker)] = BLUE
+        inside = (dist >= gap) & (dist < radius)
+        ring = np.minimum(((dist[inside] - gap) / ring_width).astype(np.int64), sections - 1)
+        theta = np.arctan2(ys, xs[None, :])[inside] % (2 * math.pi)
+        col = np.minimum((theta * (columns / (2 * math.pi))).astype(np.int64), columns - 1)
+        code = col ^ (col >> 1) if order == "gray" else col
+        band[inside] = np.where(column_bit(code, sections, ring, invert, reverse), WHITE, BLACK)
+        yield band
+
+
+def png_chunk(kind: bytes, data: bytes) -> bytes:
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+
+def write_png(handle, size: int, bands) -> None:
+    # 8-bit palette PNG, compressed band by band with zlib.
+    import numpy as np
+
+    handle.write(b"\x89PNG\r\n\x1a\n")
+    handle.write(png_chunk(b"IHDR", struct.pack(">IIBBBBB", size, size, 8, 3, 0, 0, 0)))
+    handle.write(png_chunk(b"PLTE", bytes(c for rgb in PALETTE for c in rgb)))
+    compressor = zlib.compressobj(6)
+    for band in bands:
+        # Filter type 0 (none) in front of every row.
+        rows = np.hstack([np.zeros((len(band), 1), dtype=np.uint8), band])
+        data = compressor.compress(rows.tobytes())
+        if data:
+            handle.write(png_chunk(b"IDAT", data))
+    handle.write(png_chunk(b"IDAT", compressor.flush()))
+    handle.write(png_chunk(b"IEND", b""))
+
+
+def write_svg(handle, sections: int, order: str, size: int, invert: bool, reverse: bool) -> None:
+    # Vector disk: each ring is a black annulus with one white sector per run
+    # of 1 bits, so the element count grows with the runs, not the columns.
+    import numpy as np
+
+    columns = 1 << sections
+    cols = np.arange(columns, dtype=np.int64)
+    codes = cols ^ (cols >> 1) if order == "gray" else cols
+    radius, gap, ring_width, marker = disk_layout(size, sections)
+    c = size / 2
+
+    def rgb(color: tuple[int, int, int]) -> str:
+        return "#%02x%02x%02x" % color
+
+    def annulus(inner: float, outer: float, color: tuple[int, int, int]) -> str:
+        return (
+            f'<circle cx="{c:g}" cy="{c:g}" r="{(inner + outer) / 2:.3f}" fill="none" '
+            f'stroke="{rgb(color)}" stroke-width="{outer - inner:.3f}"/>\n'
+        )
+
+    def point(r: float, col: int) -> str:
+        angle = 2 * math.pi * col / columns
+        return f"{c + r * math.cos(angle):.3f},{c + r * math.sin(angle):.3f}"
+
+    handle.write(
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{size}" height="{size}" '
+        f'viewBox="0 0 {size} {size}">\n'
+        f'<rect width="{size}" height="{size}" fill="{rgb(BACKGROUND)}"/>\n'
+    )
+    handle.write(annulus(max(0.0, gap - marker), gap, PALETTE[BLUE]))
+    handle.write(annulus(radius, radius + marker, PALETTE[BLUE]))
+    for ring in range(sections):
+        inner = gap + ring * ring_width
+        outer = inner + ring_width
+        handle.write(annulus(inner, outer, PALETTE[BLACK]))
+        bits = column_bit(codes, sections, ring, invert, reverse).astype(np.int8)
+        edges = np.flatnonzero(np.diff(np.concatenate(([0], bits, [0]))))
+        for start, end in zip(edges[::2].tolist(), edges[1::2].tolist()):
+            large = int(end - start > columns / 2)
+            handle.write(
+                f'<path fill="{rgb(PALETTE[WHITE])}" d="M{point(outer, start)}'
+                f"A{outer:.3f},{outer:.3f} 0 {large} 1 {point(outer, end)}"
+                f"L{point(inner, end)}"
+                f'A{inner:.3f},{inner:.3f} 0 {large} 0 {point(inner, start)}Z"/>\n'
+            )
+    handle.write("</svg>\n")
+
+
+def render_path(
+    sections: int, order: str, size: int, invert: bool, reverse: bool, fmt: str
+) -> Path:
+    name = f"{sections}-{order}-{size}-{'i' if invert else 'n'}{'r' if reverse else 'n'}.{fmt}"
+    return RENDER_CACHE / name
+
+
+def render_pattern(
+    sections: int, order: str, size: int, invert: bool = False, reverse: bool = False, fmt: str = "png"
+) -> Path:
+    # Rendered file for these parameters, drawn on first request only.
+    path = render_path(sections, order, size, invert, reverse, fmt)
+    if path.exists():
+        return path
+    path.parent.mkdir(exist_ok=True)
+    # Unique per thread: the server may render the same key concurrently.
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}-{threading.get_ident()}.tmp")
+    if fmt == "png":
+        with open(tmp_path, "wb") as handle:
+            write_png(handle, size, raster_bands(sections, order, size, invert, reverse))
+    else:
+        with open(tmp_path, "w", encoding="utf-8") as handle:
+            write_svg(handle, sections, order, size, invert, reverse)
+    os.replace(tmp_path, path)
+    return path
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Render the radial pattern disk to PNG or SVG (cached)."
+    )
+    parser.add_argument("sections", type=int, help="Number of radial sections (rings).")
+    parser.add_argument("--order", choices=["gray", "binary"], default="gray")
+    parser.add_argument(
+        "--size",
+        type=int,
+        default=2000,
+        help="Image width and height in pixels (default: 2000).",
+    )
+    parser.add_argument("--invert", action="store_true", help="Swap black and white bits.")
+    parser.add_argument(
+        "--reverse",
+        action="store_true",
+        help="Put the least significant bit on the inner ring.",
+    )
+    parser.add_argument("--format", choices=["png", "svg"], default="png")
+    parser.add_argument("--output", help="Copy the rendered file here.")
+    args = parser.parse_args()
+
+    if not 1 <= args.sections <= 24:
+        raise SystemExit("sections must be between 1 and 24")
+    if args.size < 16:
+        raise SystemExit("size must be >= 16")
+    if args.format == "svg" and args.sections > MAX_SVG_SECTIONS:
+        raise SystemExit(f"svg output is limited to {MAX_SVG_SECTIONS} sections; use png")
+    path = render_pattern(
+        args.sections, args.order, args.size, args.invert, args.reverse, args.format
+    )
+    if args.output:
+        Path(args.output).write_bytes(path.read_bytes())
+        path = Path(args.output)
+    print(f"Wrote {path}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+import argparse
+from itertools import combinations
+from pathlib import Path
+
+from angle_from_column import (
+    lcm_list,
+    pattern_codes,
+    pattern_rings,
+    require_numpy,
+    segment_cells,
+)
+from pattern_generation import ecc_masks, parse_pattern, ring_bit_chunks
+
+# Upper bound on code probes (columns x flip patterns) spent per distance
+# while searching for the minimum pairwise Hamming distance.
+PROBE_BUDGET = 1 << 28
+# A dense bitset over every possible code is used while it costs at most this
+# many bytes per column; wider codes are sorted and binary-searched instead.
+BITSET_BYTES_PER_CODE = 8
+
+
+def popcount(values):
+    np = require_numpy()
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(values)
+    values = values.astype(np.uint64)
+    count = np.zeros(values.shape, dtype=np.uint8)
+    while values.any():
+        count += (values & np.uint64(1)).astype(np.uint8)
+        values >>= np.uint64(1)
+    return count
+
+
+def ring_cells(rings: list[list[int]]) -> tuple[list[int], list[int]]:
+    # Per-cell codes and start columns for rings of unequal length: one cell
+    # per stretch between ring boundaries.
+    starts, codes = segment_cells(rings, lcm_list([len(ring) for ring in rings]))
+    return codes, starts
+
+
+def stream_codes(sections: int, order: str, ecc: str | None = None):
+    # Column codes rebuilt from the generator's own ring bits, ring by ring.
+    np = require_numpy()
+    codes = np.zeros(1 << sections, dtype=np.uint64)
+    offset = 0
+    for _, bits in ring_bit_chunks(sections, order, ecc):
+        end = offset + len(bits)
+        codes[offset:end] = (codes[offset:end] << np.uint64(1)) | bits
+        offset = end % len(codes)
+    return codes
+
+
+def code_set(codes, ring_count: int):
+    # (distinct code count, present(probes) -> bool array of membership).
+    np = require_numpy()
+    if (1 << ring_count) // 8 <= BITSET_BYTES_PER_CODE * max(len(codes), 1):
+        seen = np.zeros(((1 << ring_count) + 7) // 8, dtype=np.uint8)
+        np.bitwise_or.at(
+            seen, codes >> np.uint64(3), np.left_shift(1, codes & np.uint64(7)).astype(np.uint8)
+        )
+
+        def present(probe):
+            bit = (seen[probe >> np.uint64(3)] >> (probe & np.uint64(7)).astype(np.uint8)) & 1
+            return bit.astype(bool)
+
+        return int(popcount(seen).sum()), present
+
+    ordered = np.unique(codes)
+
+    def present(probe):
+        at = np.minimum(np.searchsorted(ordered, probe), len(ordered) - 1)
+        return ordered[at] == probe
+
+    return len(ordered), present
+
+
+def min_distance(
+    codes, ring_count: int, present, upper: int | None = None
+) -> tuple[int | None, bool]:
+    # Smallest Hamming distance between two distinct codes, found by probing
+    # every code's d-bit flips against the code set, d = 1, 2, ... below upper
+    # (a distance already seen, e.g. between adjacent columns). Returns
+    # (distance, exact); past PROBE_BUDGET it returns the bound reached.
+    np = require_numpy()
+    probes = 0
+    for distance in range(1, upper or ring_count + 1):
+        for flips in combinations(range(ring_count), distance):
+            if probes > PROBE_BUDGET:
+                return distance, False
+            mask = np.uint64(sum(1 << bit for bit in flips))
+            if present(codes ^ mask).any():
+                return distance, True
+            probes += len(codes)
+    return upper, True
+
+
+def validate_codes(codes, ring_count: int, cyclic: bool = True, positions=None) -> dict:
+    # codes: one packed code per column (or cell), ring 0 as the MSB.
+    np = require_numpy()
+    codes = np.asarray(codes, dtype=np.uint64)
+    # positions: start column of each entry when codes are ring cells.
+    unit = "columns" if positions is None else "cells"
+    report: dict = {"rings": ring_count, "columns": int(len(codes)), "unit": unit}
+
+    distinct, present = code_set(codes, ring_count)
+    report["distinct"] = distinct
+    report["duplicates"] = len(codes) - distinct
+    if report["duplicates"]:
+        values, counts = np.unique(codes, return_counts=True)
+        dup = int(np.argmax(counts > 1))
+        cols = np.flatnonzero(codes == values[dup])[:4]
+        if positions is not None:
+            cols = [positions[col] for col in cols.tolist()]
+        report["example_duplicate"] = {
+            "code": format(int(values[dup]), f"0{ring_count}b"),
+            "columns": [int(col) for col in cols],
+        }
+
+    # Adjacent columns (wrapping around the disk if cyclic).
+    following = np.roll(codes, -1) if cyclic else codes[1:]
+    steps = popcount(codes[: len(following)] ^ following)
+    if len(steps):
+        report["adjacent_min"] = int(steps.min())
+        report["adjacent_max"] = int(steps.max())
+        report["non_single_transitions"] = int((steps != 1).sum())
+        bad = np.flatnonzero(steps != 1)
+        if len(bad):
+            col = int(bad[0])
+            report["first_non_single"] = positions[col] if positions is not None else col
+
+    if report["duplicates"]:
+        report["min_distance"] = 0
+    else:
+        distance, exact = min_distance(codes, ring_count, present, report.get("adjacent_min"))
+        report["min_distance"] = distance
+        if not exact:
+            report["min_distance_at_least"] = True
+    return report
+
+
+def validate_pattern_data(data: dict) -> dict:
+    if data.get("procedural") and data.get("scheme") != "vernier":
+        sections = data["sections"]
+        ring_count = sections + (len(ecc_masks(sections, data["ecc"])) if data.get("ecc") else 0)
+        return validate_codes(
+            stream_codes(sections, data.get("order", "gray"), data.get("ecc")), ring_count
+        )
+    # Equal-length rings (packed ones unpacked straight to codes) are checked
+    # column by column; only unequal ones need the cell sweep.
+    found = pattern_codes(data)
+    if found is not None:
+        codes, ring_count = found
+        return validate_codes(codes, ring_count)
+    rings = pattern_rings(data)
+    codes, positions = ring_cells(rings)
+    return validate_codes(codes, len(rings), positions=positions)
+
+
+def format_report(report: dict) -> str:
+    lines = [
+        f"{report['columns']} {report.get('unit', 'columns')}, {report['rings']} rings: "
+        f"{report['distinct']} distinct codes, {report['duplicates']} duplicates"
+    ]
+    if "example_duplicate" in report:
+        dup = report["example_duplicate"]
+        lines.append(f"  e.g. code {dup['code']} at columns {dup['columns']}")
+    if "adjacent_min" in report:
+        text = (
+            f"adjacent Hamming distance {report['adjacent_min']}-{report['adjacent_max']}, "
+            f"{report['non_single_transitions']} non-single-bit transitions"
+        )
+        if "first_non_single" in report:
+            text += f" (first after column {report['first_non_single']})"
+        lines.append(text)
+    if report["min_distance"] is None:
+        lines.append("minimum pairwise distance: n/a (single code)")
+    else:
+        bound = ">= " if report.get("min_distance_at_least") else ""
+        lines.append(f"minimum pairwise distance: {bound}{report['min_distance']}")
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Check a pattern for unique columns and report Hamming distances."
+    )
+    parser.add_argument(
+        "pattern",
+        nargs="?",
+        default="pattern.json",
+        help="Pattern file in any pattern_generation format (default: pattern.json).",
+    )
+    args = parser.parse_args()
+
+    report = validate_pattern_data(parse_pattern(Path(args.pattern).read_bytes()))
+    print(format_report(report))
+    if report["duplicates"]:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
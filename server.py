@@ -4,14 +4,20 @@ import argparse
 import json
 import os
 from pathlib import Path
+import shutil
 import ssl
-from urllib.parse import quote
+from urllib.parse import parse_qs, quote, urlsplit
+
+from pattern_raster import MAX_SVG_SECTIONS, RENDER_SIZES, render_pattern
 
 
 class HtmlIndexHandler(SimpleHTTPRequestHandler):
     def end_headers(self) -> None:
         self.send_header("Cache-Control", "no-store")
         self.send_header("Pragma", "no-cache")
+        if urlsplit(self.path).path.endswith(".json"):
+            # JSON or packed .bin depending on Accept (see do_GET).
+            self.send_header("Vary", "Accept")
         super().end_headers()
 
     def do_GET(self) -> None:
@@ -34,6 +40,24 @@ class HtmlIndexHandler(SimpleHTTPRequestHandler):
             self.wfile.write(_last_post.encode("utf-8"))
             return
 
+        if urlsplit(self.path).path == "/render":
+            self.send_render()
+            return
+
+        wants_packed = "application/octet-stream" in self.headers.get("Accept", "")
+        if wants_packed and urlsplit(self.path).path.endswith(".json"):
+            # Clients that can read the packed pattern format get the .bin
+            # written next to the .json instead (pattern_generation --format bin).
+            packed = Path(self.translate_path(self.path)).with_suffix(".bin")
+            if packed.is_file():
+                data = packed.read_bytes()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/octet-stream")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+                return
+
         if self.path not in ("/", "/index.html"):
             return super().do_GET()
 
@@ -63,6 +87,45 @@ class HtmlIndexHandler(SimpleHTTPRequestHandler):
         body.append("</body></html>")
         self.wfile.write("\n".join(body).encode("utf-8"))
 
+    def send_render(self) -> None:
+        # /render?sections=9&order=gray&size=4000&invert=1&reverse=0&format=png
+        query = parse_qs(urlsplit(self.path).query)
+
+        def param(name: str, default: str) -> str:
+            return query.get(name, [default])[0]
+
+        try:
+            sections = int(param("sections", "9"))
+            size = int(param("size", "2000"))
+        except ValueError:
+            self.send_error(400)
+            return
+        order = param("order", "gray")
+        fmt = param("format", "png")
+        invert = param("invert", "0") in ("1", "true")
+        reverse = param("reverse", "0") in ("1", "true")
+        # Fixed sizes and an SVG section cap keep .render_cache/ and each
+        # response bounded whatever clients ask for.
+        max_sections = 24 if fmt == "png" else MAX_SVG_SECTIONS
+        if not 1 <= sections <= max_sections or size not in RENDER_SIZES:
+            self.send_error(400)
+            return
+        if order not in ("gray", "binary") or fmt not in ("png", "svg"):
+            self.send_error(400)
+            return
+        try:
+            path = render_pattern(sections, order, size, invert, reverse, fmt)
+        except ImportError:
+            # The rasterizer needs numpy.
+            self.send_error(501)
+            return
+        with open(path, "rb") as handle:
+            self.send_response(200)
+            self.send_header("Content-Type", "image/png" if fmt == "png" else "image/svg+xml")
+            self.send_header("Content-Length", str(os.fstat(handle.fileno()).st_size))
+            self.end_headers()
+            shutil.copyfileobj(handle, self.wfile)
+
     def do_POST(self) -> None:
         global _last_post
         if self.path == "/revert":